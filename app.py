@@ -1,51 +1,138 @@
-from flask import Flask, render_template, jsonify, send_from_directory, request, g, session, redirect, url_for
+from flask import Flask, render_template, jsonify, send_from_directory, send_file, request, g, session, redirect, url_for, abort
 import os
 import json
+import time
+import mimetypes
+import click
+from jinja2 import TemplateNotFound
+import hashlib
+import secrets
+from urllib.parse import urlsplit
 from utils.translations import TranslationManager
+from utils.translation_bundles import TranslationBundles
+from utils.quiz_store import QuizStore
+from utils.quiz_manifest import QuizManifest
+from utils.attempts import Attempt, AttemptStore
+from utils.subject_registry import SubjectRegistry
+from utils.audio_manager import AudioFileManager
+from utils.audio_peaks import AudioPeaks, PEAK_COUNT
+from utils.page_cache import PageCache
+from utils.assets import AssetPipeline
+from utils.site_export import export_site
+from utils.distributions import DISTRIBUTIONS, DistributionError, evaluate, result_cache
+from utils.metrics import Metrics
+from utils.prefork import PreforkServer
+from utils.compression import PrecompressedFiles, choose_encoding, send_variants
+from utils.locales import locale_converter, locale_from_path, localized_path, negotiate_locale
 
 app = Flask(__name__)
 app.secret_key = 'aesi-secret-key-2024'  # Required for session management
+# Scheme and host of absolute URLs in pages (og:url, og:image), e.g. https://aesi.example.com.
+# Cached pages are shared by every client, so they never use the request's Host header.
+app.config['CANONICAL_URL'] = os.environ.get('AESI_CANONICAL_URL', '').rstrip('/')
 translation_manager = TranslationManager(os.path.join(os.path.dirname(__file__), 'translations'))
+subject_registry = SubjectRegistry(translation_manager)
+translation_manager.add_reload_listener(subject_registry.rebuild)
+# Pages live under /<locale>/, so every URL has exactly one language
+app.url_map.converters['locale'] = locale_converter(lambda: translation_manager.available_locales)
+quiz_store = QuizStore(os.path.join(app.static_folder, 'quizzes'))
+quiz_manifest = QuizManifest(quiz_store.quizzes_dir)
+# Listings only include the subjects a locale defines
+translation_manager.add_reload_listener(quiz_manifest.invalidate)
+# Quiz answers are queued in memory and written to SQLite in batches by a background thread,
+# started with the first answer, so importing the app opens no database
+attempt_store = AttemptStore(os.path.join(app.instance_path, 'attempts.sqlite3'))
+audio_manager = AudioFileManager(os.path.join(app.static_folder, 'assets'))
+# Waveforms are decoded once per file in a background process and cached on disk
+audio_peaks = AudioPeaks(os.path.join(app.instance_path, 'audio_peaks'))
+audio_manager.add_change_listener(lambda: audio_peaks.schedule(audio_manager.index.entries))
+asset_pipeline = AssetPipeline(app.static_folder, os.path.join(app.static_folder, 'bundles.json'), app.static_url_path)
+static_files = PrecompressedFiles(app.static_folder)
+# Pages get only the translation keys their templates and scripts read
+translation_bundles = TranslationBundles(translation_manager, app.jinja_env, app.static_folder, asset_pipeline.sources)
+
+MAX_EXPLANATIONS_PER_PAGE = 100
+MAX_ATTEMPTS_PER_REQUEST = 100
+
+# Pages are the same for everyone with a given URL, so shared caches may keep them
+PAGE_HEADERS = {'Cache-Control': 'public, max-age=300'}
+
+def get_preferred_locale():
+    """The visitor's language: the one they picked with set_language, else their Accept-Language"""
+    available = translation_manager.available_locales
+    locale = session.get('locale')
+    if locale in available:
+        return locale
+    g.locale_negotiated = True
+    return negotiate_locale(request.accept_languages, available, translation_manager.default_locale)
 
 def get_current_locale():
-    """Get current locale from session or default to Portuguese"""
-    return session.get('locale', 'pt_PT')
+    """Get the locale of the request: its URL prefix, then ?locale=, then the visitor's preference.
+
+    Locale-prefixed pages never touch the session, so their responses carry no
+    cookie and are safe for shared caches.
+    """
+    locale = g.get('locale')
+    if locale is None:
+        available = translation_manager.available_locales
+        locale = locale_from_path(request.path, available)
+        if locale is None:
+            requested = request.args.get('locale')
+            locale = requested if requested in available else get_preferred_locale()
+        g.locale = locale
+    return locale
+
+@app.url_value_preprocessor
+def pull_locale(endpoint, values):
+    if values and 'locale' in values:
+        g.locale = values.pop('locale')
+
+@app.after_request
+def vary_on_language(response):
+    # Responses that fell back to Accept-Language depend on it (reading the session adds Vary: Cookie)
+    if g.get('locale_negotiated'):
+        response.vary.add('Accept-Language')
+    return response
+
+@app.url_defaults
+def add_locale(endpoint, values):
+    if 'locale' not in values and app.url_map.is_endpoint_expecting(endpoint, 'locale'):
+        values['locale'] = get_current_locale()
+
+page_cache = PageCache(os.path.join(app.root_path, app.template_folder), get_current_locale)
+page_cache.depends_on(audio_manager.current_version)
+page_cache.depends_on(asset_pipeline.current_version)
+translation_manager.add_reload_listener(page_cache.invalidate)
+
+# Per-endpoint latency histograms, Server-Timing headers and cache counters, exported on /metrics
+metrics = Metrics()
+metrics.init_app(app)
+metrics.instrument(translation_manager, 'get_translations', 'translations')
+metrics.instrument(quiz_store, 'get', 'quiz')
+metrics.register_cache('page', page_cache)
+metrics.register_cache('translations', translation_manager)
+metrics.register_cache('translation_bundles', translation_bundles)
+metrics.register_cache('quiz', quiz_store)
+metrics.register_cache('audio_peaks', audio_peaks)
+metrics.register_cache('distributions', result_cache)
+
+@app.template_filter('duration')
+def format_duration(seconds):
+    """Format seconds as m:ss, like the podcast player does"""
+    if not seconds:
+        return '--:--'
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+def get_quiz_language(locale):
+    """Map a locale to the language code used inside quiz files"""
+    return 'pt' if locale == 'pt_PT' else 'en'
 
 def get_subjects_from_translations(locale='pt_PT'):
     """
-    Dynamically build subjects structure from translations
+    Get the subjects structure built from translations for a locale
     """
-    try:
-        translations = translation_manager.load_translations(locale)
-        subjects_data = translations.get('subjects', {})
-        subjects = {}
-
-        for subject_id, subject_data in subjects_data.items():
-            # Skip coming soon subjects
-            if subject_id in translations.get('coming_soon', {}):
-                continue
-
-            features = []
-            pages = subject_data.get('pages', {})
-
-            for page_id, page_data in pages.items():
-                if page_id != 'home':  # Skip home page as it's the subject index
-                    features.append({
-                        'id': page_id,
-                        'name': page_id,
-                        'icon': page_data.get('icon', 'fa-question-circle')
-                    })
-
-            subjects[subject_id] = {
-                'name': subject_data.get('name', ''),
-                'icon': subject_data.get('icon', 'fa-chart-line'),
-                'features': features
-            }
-
-        return subjects
-    except Exception as e:
-        print(f"Error loading subjects from translations: {e}")
-        return {}
+    return subject_registry.for_locale(locale).subjects
 
 # Make translations and subjects available to all templates
 @app.context_processor
@@ -54,143 +141,227 @@ def inject_global_data():
         locale = get_current_locale()
         return translation_manager.get_translations(subject, page, locale)
 
+    def get_episode_audio(episode_id):
+        return audio_manager.get_episode(episode_id, get_current_locale())
+
     return dict(
         get_translations=get_translations,
+        get_episode_audio=get_episode_audio,
         subjects=get_subjects_from_translations(get_current_locale()),
         current_locale=get_current_locale(),
-        available_locales=['pt_PT', 'en_US', 'es_ES']
+        available_locales=sorted(translation_manager.available_locales)
     )
 
-@app.route("/")
+def render_page(template, section, page, locale, include=(), **context):
+    """Render a page with its trimmed translations: `translations` for the templates, `js_translations` for its scripts"""
+    bundle = translation_bundles.get(template, section, page, locale, include)
+    return render_template(template, translations=bundle.template, js_translations=bundle.script, **context)
+
+@app.template_global()
+def absolute_url(path):
+    """A path on the configured canonical host; left relative when none is configured"""
+    return app.config['CANONICAL_URL'] + path
+
+@app.template_global()
+def asset_url(bundle):
+    """URL of the fingerprinted build of a CSS/JS bundle"""
+    return url_for('serve_asset', filename=asset_pipeline.url_name(bundle))
+
+def render_not_found():
+    """Render the 404 page, cached per locale"""
+    def render():
+        return render_page('general/404.html', 'general', 'home', get_current_locale(), title="Página Não Encontrada"), 404
+
+    return page_cache.respond(('page_not_found', get_current_locale()), render, cacheable_status=(404,))
+
+@app.route("/<locale:locale>/")
+@page_cache.cached
 def home():
     locale = get_current_locale()
-    # Combine all translations fetching into a single operation
-    translations = translation_manager.get_translations('general', 'home', locale)
-
-    # Use translation_manager to efficiently get all needed translations
-    full_translations = translation_manager.load_translations(locale)
-    translations.update({
-        'subjects': full_translations.get('subjects', {}),
-        'pages': full_translations.get('pages', {}),
-        'general': full_translations.get('general', {})
-    })
+    # Shared read-only view of the general translations with the full pages tree layered on top
+    translations = translation_manager.get_translations('general', 'home', locale, include=('pages',))
 
     # Get coming soon subjects for display (this could be cached if needed)
     coming_soon = translation_manager.get_coming_soon_subjects(locale)
 
-    response = render_template(
-        "general/homepage.html",
+    response = render_page(
+        "general/homepage.html", 'general', 'home', locale, include=('pages',),
         title=translations['general']['platform_name'],
-        translations=translations,
         coming_soon=coming_soon
     )
-      # Add cache control headers for better performance
-    headers = {
-        'Cache-Control': 'public, max-age=300',  # Cache for 5 minutes
-        'Vary': 'Accept-Language'  # Vary cache by language
-    }
-    return response, 200, headers
+    return response, 200, PAGE_HEADERS
 
 # Dynamic subject route generation
-@app.route("/<subject>")
+@app.route("/<locale:locale>/<subject>")
+@page_cache.cached
 def subject_home(subject):
     locale = get_current_locale()
-    subjects = get_subjects_from_translations(locale)
-    if subject not in subjects:
-        # Always provide translations context to 404
-        translations = translation_manager.get_translations('general', 'home', locale)
-        return render_template('general/404.html', translations=translations, title="Página Não Encontrada"), 404
+    if not subject_registry.for_locale(locale).has_subject(subject):
+        return render_not_found()
 
     translations = translation_manager.get_translations(subject, 'home', locale)
-    return render_template(
-        f"subjects/{subject}/index.html",
+    response = render_page(
+        f"subjects/{subject}/index.html", subject, 'home', locale,
         title=translations['page']['title'],
-        translations=translations,
         subject_id=subject
     )
+    return response, 200, PAGE_HEADERS
 
 # Dynamic subject feature route generation
-@app.route("/<subject>/<feature>")
+@app.route("/<locale:locale>/<subject>/<feature>")
+@page_cache.cached
 def subject_feature(subject, feature):
     locale = get_current_locale()
-    subjects = get_subjects_from_translations(locale)
-    if subject not in subjects:
-        translations = translation_manager.get_translations('general', 'home', locale)
-        return render_template('general/404.html', translations=translations, title="Página Não Encontrada"), 404
-
-    # Check if feature exists for this subject
-    feature_exists = False
-    for f in subjects[subject]['features']:
-        if f['id'] == feature:
-            feature_exists = True
-            break
-
-    if not feature_exists:
-        translations = translation_manager.get_translations('general', 'home', locale)
-        return render_template('general/404.html', translations=translations, title="Página Não Encontrada"), 404
+    if not subject_registry.for_locale(locale).has_feature(subject, feature):
+        return render_not_found()
 
     translations = translation_manager.get_translations(subject, feature, locale)
-    return render_template(
-        f"subjects/{subject}/{feature}.html",
+    response = render_page(
+        f"subjects/{subject}/{feature}.html", subject, feature, locale,
         title=translations['page']['title'],
-        translations=translations,
         subject_id=subject,
         feature_id=feature
     )
+    return response, 200, PAGE_HEADERS
+
+# Pages from before the locale prefix send visitors to their language's copy
+@app.route("/")
+@app.route("/<subject>")
+@app.route("/<subject>/<feature>")
+def localize(subject=None, feature=None):
+    locale = get_preferred_locale()
+    registry = subject_registry.for_locale(locale)
+    if subject is not None and not (registry.has_feature(subject, feature) if feature else registry.has_subject(subject)):
+        return render_not_found()
+
+    target = localized_path(request.path, locale, ())
+    if request.query_string:
+        target += '?' + request.query_string.decode('latin-1')
+    response = redirect(target)
+    response.cache_control.private = True
+    return response
 
 # API routes
 @app.route("/api/quiz/<subject>/<quiz_type>")
 def get_quiz(subject, quiz_type):
     try:
-        locale = get_current_locale()
-        # Use standardized naming convention: subject_typeofquiz.json
-        quiz_path = os.path.join(app.static_folder, "quizzes", f"{subject}_{quiz_type}.json")
+        quiz = quiz_store.get(subject, quiz_type, get_quiz_language(get_current_locale()))
+        if quiz is None:
+            return jsonify({"error": "Quiz not found"}), 404
+
+        # Serve the precompiled (and precompressed) bytes; repeat visitors revalidate with the ETag and get a 304
+        response = send_variants(quiz.variants, 'application/json', quiz.etag)
+        response.cache_control.no_cache = True
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
-        if not os.path.exists(quiz_path):
+@app.route("/api/quiz/<subject>/<quiz_type>/session")
+def get_quiz_session(subject, quiz_type):
+    """Send a server-side sample of questions, without their explanations"""
+    try:
+        quiz = quiz_store.get(subject, quiz_type, get_quiz_language(get_current_locale()))
+        if quiz is None:
             return jsonify({"error": "Quiz not found"}), 404
 
-        with open(quiz_path, 'r', encoding='utf-8') as f:
-            quiz_data = json.load(f)
-
-        # Process the quiz data based on the format
-        if quiz_data:
-            # Check if this is the new translated format
-            if 'questions' in quiz_data and len(quiz_data['questions']) > 0:
-                first_question = quiz_data['questions'][0]
-                if 'question' in first_question and isinstance(first_question['question'], dict):
-                    # New translated format - extract the appropriate language
-                    lang_code = 'pt' if locale == 'pt_PT' else 'en'
-
-                    translated_quiz = {
-                        'name': quiz_data['name'].get(lang_code, quiz_data['name'].get('pt', '')),
-                        'description': quiz_data['description'].get(lang_code, quiz_data['description'].get('pt', '')),
-                        'questionsPerSession': quiz_data['questionsPerSession'],
-                        'questions': []
-                    }
-
-                    for question in quiz_data['questions']:
-                        translated_question = {
-                            'id': question['id'],
-                            'question': question['question'].get(lang_code, question['question'].get('pt', '')),
-                            'options': [opt.get(lang_code, opt.get('pt', '')) for opt in question['options']],
-                            'correctAnswer': question['correctAnswer'],
-                            'explanation': question['explanation'].get(lang_code, question['explanation'].get('pt', ''))
-                        }
-                        translated_quiz['questions'].append(translated_question)
-
-                    return jsonify(translated_quiz)
-                else:
-                    # Legacy format without translations
-                    return jsonify(quiz_data)
-            else:
-                # Legacy format without translations
-                return jsonify(quiz_data)
-
-        return jsonify({"error": "Invalid quiz format"}), 500
+        count = request.args.get('count', quiz.questions_per_session, type=int)
+        seed = request.args.get('seed', type=int)
+        if seed is None:
+            seed = secrets.randbelow(2 ** 31)
+
+        response = app.response_class(quiz.session(count, seed), mimetype='application/json')
+        # The same seed always yields the same sample, so it can be revalidated like the full quiz
+        response.set_etag(f"{quiz.etag}-{count}-{seed}")
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/quiz/<subject>/<quiz_type>/explanations")
+def get_quiz_explanations(subject, quiz_type):
+    """Send the explanations for a page of question ids (?ids=1,2,3)"""
+    try:
+        quiz = quiz_store.get(subject, quiz_type, get_quiz_language(get_current_locale()))
+        if quiz is None:
+            return jsonify({"error": "Quiz not found"}), 404
+
+        ids = [question_id for question_id in request.args.get('ids', '').split(',') if question_id]
+        if len(ids) > MAX_EXPLANATIONS_PER_PAGE:
+            return jsonify({"error": f"At most {MAX_EXPLANATIONS_PER_PAGE} ids per request"}), 400
+
+        response = app.response_class(quiz.explanations_for(ids), mimetype='application/json')
+        response.set_etag(f"{quiz.etag}-{hashlib.sha1(','.join(ids).encode('utf-8')).hexdigest()}")
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/quiz/<subject>/<quiz_type>/attempts", methods=["POST"])
+def record_quiz_attempts(subject, quiz_type):
+    """Queue answered questions ({"answers": [{"id": 3, "selected": 1}]}) for the per-question statistics.
+
+    `selected` is the option's index in the quiz file, not its shuffled position.
+    Nothing is written on the request path; the attempt store flushes in the background.
+    """
+    # Answers don't depend on the language, so don't touch the session for it
+    quiz = quiz_store.get(subject, quiz_type, get_quiz_language(translation_manager.default_locale))
+    if quiz is None:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    data = request.get_json(force=True, silent=True)
+    answers = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(answers, list):
+        return jsonify({"error": "Expected {\"answers\": [{\"id\": ..., \"selected\": ...}]}"}), 400
+    if len(answers) > MAX_ATTEMPTS_PER_REQUEST:
+        return jsonify({"error": f"At most {MAX_ATTEMPTS_PER_REQUEST} answers per request"}), 400
+
+    answered_at = time.time()
+    attempts = []
+    for answer in answers:
+        if not isinstance(answer, dict):
+            continue
+        question_id = str(answer.get('id'))
+        selected = answer.get('selected')
+        expected = quiz.answers.get(question_id)
+        if expected is None or type(selected) is not int or not 0 <= selected < expected[1]:
+            continue
+        attempts.append(Attempt(subject, quiz_type, question_id, selected, selected == expected[0], answered_at))
+
+    queued = attempt_store.record(attempts)
+    metrics.inc('aesi_quiz_attempts_total', queued, outcome='queued')
+    metrics.inc('aesi_quiz_attempts_total', len(attempts) - queued, outcome='dropped')
+    metrics.inc('aesi_quiz_attempts_total', len(answers) - len(attempts), outcome='rejected')
+    response = jsonify({"accepted": queued, "rejected": len(answers) - queued})
+    response.status_code = 202
+    return response
+
+@app.route("/api/quiz/<subject>/<quiz_type>/stats")
+def get_quiz_stats(subject, quiz_type):
+    """Attempts, correct rate and option distribution of every answered question, from the running counters"""
+    quiz = quiz_store.get(subject, quiz_type, get_quiz_language(translation_manager.default_locale))
+    if quiz is None:
+        return jsonify({"error": "Quiz not found"}), 404
+
+    option_counts = {question_id: count for question_id, (_, count) in quiz.answers.items()}
+    stats = attempt_store.stats(subject, quiz_type, option_counts)
+    response = jsonify({
+        "questions": {
+            question_id: {
+                "attempts": question.attempts,
+                "correct": question.correct,
+                "correctRate": round(question.correct_rate, 4),
+                "options": list(question.options)
+            }
+            for question_id, question in stats.items()
+        }
+    })
+    # Counters only change when a batch is flushed
+    response.cache_control.max_age = int(attempt_store.flush_interval)
+    return response
+
 # Backward compatibility route for old quiz URLs
 @app.route("/api/quiz/<subject>")
 def get_quiz_legacy(subject):
@@ -199,54 +370,219 @@ def get_quiz_legacy(subject):
 
 @app.route("/api/quizzes")
 def get_quizzes():
-    quizzes = []
+    """List the quizzes of the current locale's subjects, straight from the manifest"""
     locale = get_current_locale()
-    lang_code = 'pt' if locale == 'pt_PT' else 'en'
-    quiz_dir = os.path.join(app.static_folder, "quizzes")
-
-    # Get all subjects from translations
-    subjects = get_subjects_from_translations(locale)
-
-    for subject_id in subjects.keys():
-        # Check for both quiz types: quiz and descobrir
-        for quiz_type in ['quiz', 'descobrir']:
-            quiz_path = os.path.join(quiz_dir, f"{subject_id}_{quiz_type}.json")
-
-            if os.path.exists(quiz_path):
-                try:
-                    with open(quiz_path, 'r', encoding='utf-8') as f:
-                        quiz_data = json.load(f)
-
-                    # Extract translated name and description
-                    name = quiz_data.get('name', {}).get(lang_code, quiz_data.get('name', {}).get('pt', f"{subject_id} {quiz_type}"))
-                    description = quiz_data.get('description', {}).get(lang_code, quiz_data.get('description', {}).get('pt', ''))
-
-                    quizzes.append({
-                        "subject": subject_id,
-                        "type": quiz_type,
-                        "name": name,
-                        "description": description,
-                        "questionsPerSession": quiz_data.get('questionsPerSession', 10)
-                    })
-                except Exception as e:
-                    print(f"Error loading quiz {quiz_path}: {e}")
-                    continue
-
-    return jsonify(quizzes)
-
-@app.route("/set_language/<locale>")
-def set_language(locale):
-    """Set the user's language preference"""
-    if locale in ['pt_PT', 'en_US', 'es_ES']:
-        session['locale'] = locale
-    return redirect(request.referrer or url_for('home'))
+    listing = quiz_manifest.listing(locale, get_quiz_language(locale), get_subjects_from_translations(locale))
+    return send_variants(listing.variants, 'application/json', listing.etag)
+
+@app.route("/api/distribution/<name>")
+def get_distribution(name):
+    """Evaluate a distribution over a range (?n=10&p=0.5&start=0&stop=10&quantiles=0.025,0.975)"""
+    distribution = DISTRIBUTIONS.get(name)
+    if distribution is None:
+        return jsonify({"error": f"Unknown distribution: {name}"}), 404
+
+    try:
+        params = tuple(float(request.args[param]) for param in distribution.params)
+        start = request.args.get('start', type=float)
+        stop = request.args.get('stop', type=float)
+        points = request.args.get('points', 81, type=int)
+        quantiles = tuple(float(q) for q in request.args.get('quantiles', '').split(',') if q)
+    except KeyError as e:
+        return jsonify({"error": f"Missing parameter: {e.args[0]}"}), 400
+    except ValueError:
+        return jsonify({"error": "Parameters must be numbers"}), 400
+
+    try:
+        body = evaluate(name, params, start, stop, points, quantiles)
+    except DistributionError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+@app.route("/audio/<path:filename>")
+def stream_audio(filename):
+    """Stream an indexed podcast episode, honouring Range and If-Range for seeking"""
+    audio_manager.refresh()
+    entry = audio_manager.index.get(filename)
+    if entry is None:
+        abort(404)
+
+    # send_file answers Range requests with 206 and wraps the file in the server's
+    # wsgi.file_wrapper; under `flask serve` the body then goes out with sendfile()
+    return send_file(
+        entry.path,
+        mimetype='audio/wav',
+        conditional=True,
+        etag=entry.etag,
+        last_modified=entry.mtime,
+        max_age=3600
+    )
+
+@app.route("/api/audio/<filename>/peaks")
+def get_audio_peaks(filename):
+    """Duration and waveform of an episode, max-pooled to ?points= bars, without touching the audio"""
+    audio_manager.refresh()
+    entry = audio_manager.index.get(filename)
+    if entry is None or audio_peaks.failed(entry):
+        abort(404)
+
+    peaks = audio_peaks.get(entry)
+    if peaks is None:
+        # Still being computed: tell the player when to ask again
+        response = jsonify({"status": "pending"})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        response.cache_control.no_store = True
+        return response
+
+    points = max(1, min(request.args.get('points', 200, type=int), PEAK_COUNT))
+    body = json.dumps({
+        "duration": round(peaks.duration, 3),
+        "sampleRate": peaks.sample_rate,
+        "channels": peaks.channels,
+        "peaks": list(peaks.downsample(points))
+    }, separators=(',', ':')).encode('utf-8')
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(f"{entry.etag}-{points}")
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
+@app.route("/assets/<filename>")
+def serve_asset(filename):
+    """Serve a fingerprinted bundle; its name changes with its content, so it never needs revalidating"""
+    asset = asset_pipeline.get(filename)
+    if asset is None:
+        abort(404)
+
+    response = send_variants(asset.variants, asset.mimetype, asset.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
+
+def send_static_file(filename):
+    """Serve a static file, from its precompressed variant when the client accepts one"""
+    entry = static_files.get(filename)
+    if entry is None or choose_encoding(entry.variants) == 'identity':
+        response = app.send_static_file(filename)
+        if entry is not None and len(entry.variants) > 1:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_variants(entry.variants, mimetype, entry.etag, conditional=False)
+    response.last_modified = entry.mtime_ns / 1e9
+    max_age = app.get_send_file_max_age(filename)
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+app.view_functions['static'] = send_static_file
+
+@app.route("/metrics")
+def get_metrics():
+    """Request latencies, phase timings and cache counters in the Prometheus text format"""
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route("/healthz")
+def healthz():
+    """Readiness check: 200 once translations, subjects and asset bundles are loaded"""
+    checks = {
+        'translations': bool(translation_manager.available_locales),
+        'subjects': bool(get_subjects_from_translations(translation_manager.default_locale)),
+        'assets': asset_pipeline.version > 0
+    }
+    ready = all(checks.values())
+    response = jsonify({"status": "ok" if ready else "unavailable", "pid": os.getpid(), "checks": checks})
+    response.status_code = 200 if ready else 503
+    response.cache_control.no_store = True
+    return response
+
+@app.route("/set_language/<locale:locale>")
+def set_language():
+    """Remember the user's language and show the page they came from (?next=) in it"""
+    locale = get_current_locale()
+    session['locale'] = locale
+    path = request.args.get('next') or urlsplit(request.referrer or '').path
+    return redirect(localized_path(path, locale, translation_manager.available_locales) if path else url_for('home'))
 
 @app.errorhandler(404)
 def page_not_found(e):
-    # Provide minimal translations for 404 page
-    locale = get_current_locale()
-    translations = translation_manager.get_translations('general', 'home', locale)
-    return render_template('general/404.html', translations=translations, title="Página Não Encontrada"), 404
+    return render_not_found()
+
+@app.cli.command("export")
+@click.option('--output', '-o', default='build', show_default=True, help='Directory to write the static site to.')
+def export_command(output):
+    """Pre-render every page and quiz payload for every locale."""
+    written = export_site(app, output, translation_manager.available_locales, subject_registry, quiz_manifest)
+    written += asset_pipeline.write(os.path.join(output, 'assets'))
+    click.echo(f"Exported {written} files to {output}")
+
+@app.cli.command("build-assets")
+@click.option('--output', '-o', default=os.path.join('static', 'dist'), show_default=True,
+              help='Directory to write the fingerprinted bundles and manifest.json to.')
+def build_assets_command(output):
+    """Write the fingerprinted CSS/JS bundles and their manifest."""
+    written = asset_pipeline.write(output)
+    click.echo(f"Wrote {written} files to {output}")
+
+def preload():
+    """Load everything the workers share before forking: templates, translation bundles, compressed static files and compiled quizzes"""
+    for template in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template)
+    print(f"Precompressed {static_files.preload()} static files")
+
+    quizzes = quiz_manifest.quizzes()
+    for locale in translation_manager.available_locales:
+        pages = [
+            ('general/homepage.html', 'general', 'home', ('pages',)),
+            ('general/404.html', 'general', 'home', ())
+        ]
+        for subject_id, subject in get_subjects_from_translations(locale).items():
+            pages.append((f"subjects/{subject_id}/index.html", subject_id, 'home', ()))
+            pages.extend((f"subjects/{subject_id}/{feature.id}.html", subject_id, feature.id, ())
+                         for feature in subject.features)
+        for template, section, page, include in pages:
+            try:
+                translation_bundles.get(template, section, page, locale, include)
+            except TemplateNotFound:
+                print(f"Skipping translation bundle of {template}: template not found")
+        for subject_id, quiz_type in quizzes:
+            quiz_store.get(subject_id, quiz_type, get_quiz_language(locale))
+
+@app.cli.command("serve")
+@click.option('--host', default='0.0.0.0', show_default=True, envvar='AESI_HOST')
+@click.option('--port', default=5051, show_default=True, envvar='AESI_PORT')
+@click.option('--workers', '-w', default=os.cpu_count() or 1, show_default=True, envvar='AESI_WORKERS',
+              help='Worker processes to fork.')
+@click.option('--threads', '-t', default=4, show_default=True, envvar='AESI_THREADS',
+              help='Request threads per worker.')
+@click.option('--graceful-timeout', default=30.0, show_default=True, envvar='AESI_GRACEFUL_TIMEOUT',
+              help='Seconds to let requests in flight finish on shutdown.')
+def serve_command(host, port, workers, threads, graceful_timeout):
+    """Run the production server: preload once, then fork workers that share it."""
+    preload()
+    server = PreforkServer(
+        app, host, port, workers=workers, threads=threads, graceful_timeout=graceful_timeout,
+        # Threads don't survive fork, so each worker starts its own translation watcher and attempt flusher,
+        # and queues the waveforms still missing (claim files keep two workers from decoding the same one)
+        pre_fork=[translation_manager.stop_watcher, attempt_store.stop],
+        post_fork=[translation_manager.start_watcher, attempt_store.start,
+                   lambda: audio_peaks.schedule(audio_manager.index.entries)],
+        # Write the answers still queued before the worker exits
+        worker_exit=[attempt_store.stop]
+    )
+    server.serve()
 
 if __name__ == "__main__":
+    translation_manager.start_watcher()
     app.run(debug=True, host="0.0.0.0", port=5051)
@@ -0,0 +1,238 @@
+"""Route-level benchmarks for the Flask app.
+
+Drives the app in-process with the test client and reports p50/p95/p99 latency,
+throughput and tracemalloc peak memory per case, then compares the results with a
+stored baseline. Run from the repository root:
+
+    python -m benchmarks.routes                      # compare with benchmarks/baseline.json
+    python -m benchmarks.routes --update-baseline    # record a new baseline
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import STRESS_SUBJECT, build_workspace, synthetic_locales  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Differences smaller than these are noise, whatever the relative change
+ABS_SLACK_MS = 1.0
+ABS_SLACK_KIB = 64
+
+
+class Case(NamedTuple):
+    name: str
+    # Formatted with the locale of each request, e.g. /{locale}/probabilidade
+    path: str
+    locales: Tuple[str, ...] = ('pt_PT',)
+    # Drop the page and quiz caches before every request to measure a full render
+    cold: bool = False
+    synthetic: bool = False
+
+
+CASES: List[Case] = [
+    Case('home', '/{locale}/'),
+    Case('home.en_US', '/{locale}/', locales=('en_US',)),
+    Case('home.cold', '/{locale}/', cold=True),
+    Case('subject_home', '/{locale}/probabilidade'),
+    Case('subject_feature.calculator', '/{locale}/probabilidade/calculator'),
+    Case('subject_feature.podcasts', '/{locale}/probabilidade/podcasts'),
+    Case('subject_feature.quiz.cold', '/{locale}/probabilidade/quiz', cold=True),
+    Case('get_quiz', '/api/quiz/probabilidade/quiz?locale={locale}'),
+    Case('get_quiz.cold', '/api/quiz/probabilidade/quiz?locale={locale}', cold=True),
+    Case('get_quiz_session', '/api/quiz/probabilidade/quiz/session?seed=1&locale={locale}'),
+    Case('get_quizzes', '/api/quizzes?locale={locale}'),
+    Case('get_distribution.binomial.1e10.cold', '/api/distribution/binomial?n=1e10&p=0.5&quantiles=0.025,0.975', cold=True),
+    Case('get_distribution.poisson.1e9.point.cold', '/api/distribution/poisson?lambda=1e9&start=1e9&stop=1e9', cold=True),
+    Case('stress.home.subjects', '/{locale}/', synthetic=True),
+    Case('stress.home.subjects.cold', '/{locale}/', cold=True, synthetic=True),
+    Case('stress.home.locales', '/{locale}/', locales=tuple(synthetic_locales(20)), synthetic=True),
+    Case('stress.get_quizzes', '/api/quizzes?locale={locale}', synthetic=True),
+    Case('stress.get_quiz.10k', f'/api/quiz/{STRESS_SUBJECT}/quiz?locale={{locale}}', synthetic=True),
+    Case('stress.get_quiz.10k.cold', f'/api/quiz/{STRESS_SUBJECT}/quiz?locale={{locale}}', cold=True, synthetic=True),
+    Case('stress.get_quiz_session.10k', f'/api/quiz/{STRESS_SUBJECT}/quiz/session?seed=1&locale={{locale}}', synthetic=True),
+    Case('stress.get_quiz_explanations.10k',
+         f"/api/quiz/{STRESS_SUBJECT}/quiz/explanations?locale={{locale}}&ids={','.join(str(i) for i in range(1, 101))}",
+         synthetic=True),
+]
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    return samples[max(0, min(len(samples) - 1, math.ceil(p / 100 * len(samples)) - 1))]
+
+
+class Runner:
+    def __init__(self, app_module):
+        self.app_module = app_module
+        # Every case names its locale in the URL, so no session cookie is involved
+        self.client = app_module.app.test_client(use_cookies=False)
+
+    def reset_caches(self):
+        self.app_module.page_cache.invalidate()
+        self.app_module.quiz_store.clear()
+        self.app_module.result_cache.clear()
+
+    def use_workspace(self, translations_dir: str, quizzes_dir: str):
+        """Point the app at the synthetic translations and quizzes"""
+        self.app_module.translation_manager.translations_dir = translations_dir
+        self.app_module.translation_manager.check_for_updates()
+        self.app_module.quiz_store.quizzes_dir = quizzes_dir
+        self.app_module.quiz_manifest.quizzes_dir = quizzes_dir
+        self.app_module.quiz_manifest.refresh(force=True)
+        self.reset_caches()
+
+    def request(self, case: Case, i: int) -> int:
+        response = self.client.get(case.path.format(locale=case.locales[i % len(case.locales)]))
+        response.get_data()
+        return response.status_code
+
+    def run(self, case: Case, iterations: int, warmup: int, memory_samples: int) -> Dict[str, float]:
+        # Warm every locale of the case, not just the first few
+        for i in range(max(warmup, len(case.locales))):
+            if case.cold:
+                self.reset_caches()
+            status = self.request(case, i)
+            if status != 200:
+                raise RuntimeError(f"{case.name}: {case.path} returned HTTP {status}")
+
+        timings = []
+        for i in range(iterations):
+            if case.cold:
+                self.reset_caches()
+            start = time.perf_counter_ns()
+            self.request(case, i)
+            timings.append((time.perf_counter_ns() - start) / 1e6)
+
+        # Tracing slows everything down, so memory gets its own pass
+        peak = 0
+        tracemalloc.start()
+        try:
+            for i in range(memory_samples):
+                if case.cold:
+                    self.reset_caches()
+                before, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self.request(case, i)
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'iterations': iterations,
+            'p50_ms': round(percentile(timings, 50), 4),
+            'p95_ms': round(percentile(timings, 95), 4),
+            'p99_ms': round(percentile(timings, 99), 4),
+            'rps': round(iterations / (sum(timings) / 1000), 1),
+            'peak_kib': round(peak / 1024, 1)
+        }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """List every case whose p95 latency or peak memory grew by more than `threshold`"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, slack in (('p95_ms', ABS_SLACK_MS), ('peak_kib', ABS_SLACK_KIB)):
+            limit = previous[metric] * (1 + threshold)
+            if result[metric] > limit and result[metric] - previous[metric] > slack:
+                regressions.append(f"{name}: {metric} {result[metric]} > {previous[metric]} (+{threshold:.0%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]):
+    print(f"{'case':40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak KiB':>9} {'p95 vs base':>12}")
+    for name, r in results.items():
+        previous = baseline.get(name)
+        delta = f"{(r['p95_ms'] / previous['p95_ms'] - 1):+.0%}" if previous and previous['p95_ms'] else '-'
+        print(f"{name:40} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f} "
+              f"{r['rps']:9.1f} {r['peak_kib']:9.1f} {delta:>12}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200, help='Timed requests per case')
+    parser.add_argument('--cold-iterations', type=int, default=20, help='Timed requests per cold case')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--memory-samples', type=int, default=5, help='Requests traced with tracemalloc per case')
+    parser.add_argument('--only', default='', help='Run only cases whose name contains this text')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help='Allowed relative growth of p95 latency and peak memory')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--questions', type=int, default=10000, help='Questions in the synthetic quiz bank')
+    parser.add_argument('--subjects', type=int, default=200, help='Synthetic subjects')
+    args = parser.parse_args(argv)
+
+    import app as app_module
+    app_module.translation_manager.stop_watcher()
+    runner = Runner(app_module)
+
+    cases = [case for case in CASES if args.only in case.name]
+    results: Dict[str, Dict[str, float]] = {}
+    synthetic_ready = False
+    with tempfile.TemporaryDirectory(prefix='aesi-bench-') as workspace:
+        for case in cases:
+            if case.synthetic and not synthetic_ready:
+                print(f"Building synthetic workspace ({args.subjects} subjects, {args.questions} questions)...")
+                dirs = build_workspace(workspace, app_module.translation_manager.translations_dir,
+                                       app_module.quiz_store.quizzes_dir, subjects=args.subjects,
+                                       questions=args.questions)
+                runner.use_workspace(dirs['translations'], dirs['quizzes'])
+                synthetic_ready = True
+            iterations = args.cold_iterations if case.cold else args.iterations
+            results[case.name] = runner.run(case, iterations, args.warmup, args.memory_samples)
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    print_table(results, baseline)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'cold_iterations': args.cold_iterations,
+            'questions': args.questions,
+            'subjects': args.subjects
+        },
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Synthetic content for the stress cases: a huge quiz bank, many subjects and many locales"""
+import os
+import copy
+import json
+import random
+import shutil
+from typing import Any, Dict, List
+
+# Subject the 10k-question bank is registered under
+STRESS_SUBJECT = 'stress'
+
+
+def make_quiz(questions: int, options: int = 4, seed: int = 0) -> Dict[str, Any]:
+    """Build a bilingual quiz file in the subject_typeofquiz.json format"""
+    rng = random.Random(seed)
+
+    def text(prefix: str, i: int) -> Dict[str, str]:
+        filler = ' '.join(rng.choice(('amostra', 'variância', 'média', 'desvio', 'evento')) for _ in range(12))
+        return {'pt': f'{prefix} {i}: {filler}', 'en': f'{prefix} {i} (en): {filler}'}
+
+    return {
+        'name': {'pt': f'Quiz sintético ({questions})', 'en': f'Synthetic quiz ({questions})'},
+        'description': {'pt': 'Gerado para benchmarks', 'en': 'Generated for benchmarks'},
+        'questionsPerSession': 20,
+        'questions': [
+            {
+                'id': i,
+                'question': text('Pergunta', i),
+                'options': [text('Opção', j) for j in range(options)],
+                'correctAnswer': rng.randrange(options),
+                'explanation': text('Explicação', i)
+            }
+            for i in range(1, questions + 1)
+        ]
+    }
+
+
+def synthetic_locales(count: int = 20) -> List[str]:
+    """Names of the synthetic locales (xa_XX, xb_XX, ...), shaped like real ones so they route under /<locale>/"""
+    return [f'{chr(97 + i // 26)}{chr(97 + i % 26)}_XX' for i in range(count)]
+
+
+def build_workspace(root: str, source_translations: str, source_quizzes: str, subjects: int = 200,
+                    locales: int = 20, questions: int = 10000) -> Dict[str, str]:
+    """Copy the real translations and quizzes into `root` and add the synthetic content.
+
+    Every synthetic subject is a clone of `analise_estatistica` with its own small
+    quiz, so it shows up on the home page and in the quiz listing, and every
+    synthetic locale is a clone of pt_PT. Returns the translations and quizzes directories.
+    """
+    translations_dir = os.path.join(root, 'translations')
+    quizzes_dir = os.path.join(root, 'quizzes')
+    shutil.copytree(source_translations, translations_dir)
+    shutil.copytree(source_quizzes, quizzes_dir)
+
+    small_quiz = make_quiz(40)
+    for i in range(subjects):
+        _write_json(os.path.join(quizzes_dir, f'bench_{i:03d}_quiz.json'), small_quiz)
+    _write_json(os.path.join(quizzes_dir, f'{STRESS_SUBJECT}_quiz.json'), make_quiz(questions))
+
+    for filename in os.listdir(translations_dir):
+        path = os.path.join(translations_dir, filename)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        template = data['subjects']['analise_estatistica']
+        for i in range(subjects):
+            subject = copy.deepcopy(template)
+            subject['name'] = f"{template['name']} {i:03d}"
+            data['subjects'][f'bench_{i:03d}'] = subject
+        stress = copy.deepcopy(template)
+        stress['name'] = f"{template['name']} ({questions})"
+        data['subjects'][STRESS_SUBJECT] = stress
+        _write_json(path, data)
+
+    with open(os.path.join(translations_dir, 'pt_PT.json'), 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    for locale in synthetic_locales(locales):
+        _write_json(os.path.join(translations_dir, f'{locale}.json'), base)
+
+    return {'translations': translations_dir, 'quizzes': quizzes_dir}
+
+
+def _write_json(path: str, data: Any):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
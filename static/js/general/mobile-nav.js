@@ -55,6 +55,8 @@ document.addEventListener('DOMContentLoaded', function () {
         } else {
             // If there are no navigation links, build dynamic navigation from available subjects
             const currentPath = window.location.pathname;
+            // Links stay under the page's locale prefix (e.g. /en_US)
+            const localePrefix = /^\/[a-z]{2}_[A-Z]{2}(?=\/|$)/.exec(currentPath)?.[0] || '';
 
             let navHTML = `<ul class="nav-links">`;
 
@@ -69,11 +71,12 @@ document.addEventListener('DOMContentLoaded', function () {
                     });
 
                 sortedSubjects.forEach(subjectId => {
-                    const subject = window.translations.subjects[subjectId];
-                    const isSubjectPage = currentPath.startsWith(`/${subjectId}`) && !currentPath.includes(`/${subjectId}/`);
-                    const subjectIcon = subject.icon || 'fa-chart-line';
+                    // Read single keys, so the page's translation bundle only needs the names and icons
+                    const subjectName = window.translations.subjects[subjectId].name;
+                    const isSubjectPage = currentPath.startsWith(`${localePrefix}/${subjectId}`) && !currentPath.includes(`/${subjectId}/`);
+                    const subjectIcon = window.translations.subjects[subjectId].icon || 'fa-chart-line';
 
-                    navHTML += `<li><a href="/${subjectId}" ${isSubjectPage ? 'class="active" aria-current="page"' : ''}><i class="fas ${subjectIcon}"></i> ${subject.name}</a></li>`;
+                    navHTML += `<li><a href="${localePrefix}/${subjectId}" ${isSubjectPage ? 'class="active" aria-current="page"' : ''}><i class="fas ${subjectIcon}"></i> ${subjectName}</a></li>`;
                 });
             }
 
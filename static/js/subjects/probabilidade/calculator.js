@@ -1,47 +1,36 @@
 let distributionChart = null;
 
-function factorial(n) {
-    if (n === 0) return 1;
-    let result = 1;
-    for (let i = 1; i <= n; i++) {
-        result *= i;
+// Distribuições calculadas no servidor (/api/distribution), sem overflow para n grande
+async function fetchDistribution(distribution, params, options = {}) {
+    const query = new URLSearchParams();
+    Object.entries({ ...params, ...options }).forEach(([key, value]) => {
+        if (value !== undefined && value !== null) query.set(key, value);
+    });
+
+    const response = await fetch(`/api/distribution/${distribution}?${query}`);
+    const result = await response.json();
+    if (!response.ok) {
+        throw new Error(result.error || `HTTP error! status: ${response.status}`);
     }
     return result;
 }
 
-function combination(n, k) {
-    return factorial(n) / (factorial(k) * factorial(n - k));
-}
-
-function binomialProbability(n, p, k) {
-    return combination(n, k) * Math.pow(p, k) * Math.pow(1 - p, n - k);
-}
-
-function poissonProbability(lambda, k) {
-    return (Math.pow(lambda, k) * Math.exp(-lambda)) / factorial(k);
+async function binomialProbability(n, p, k) {
+    const result = await fetchDistribution('binomial', { n, p }, { start: k, stop: k });
+    return result.pmf[0];
 }
 
-function normalCDF(x, mean = 0, std = 1) {
-    const z = (x - mean) / std;
-    return 0.5 * (1 + erf(z / Math.sqrt(2)));
+async function poissonProbability(lambda, k) {
+    const result = await fetchDistribution('poisson', { lambda }, { start: k, stop: k });
+    return result.pmf[0];
 }
 
-function erf(x) {
-    // Aproximação da função de erro
-    const a1 = 0.254829592;
-    const a2 = -0.284496736;
-    const a3 = 1.421413741;
-    const a4 = -1.453152027;
-    const a5 = 1.061405429;
-    const p = 0.3275911;
-
-    const sign = (x >= 0) ? 1 : -1;
-    x = Math.abs(x);
-
-    const t = 1.0 / (1.0 + p * x);
-    const y = 1.0 - (((((a5 * t + a4) * t) + a3) * t + a2) * t + a1) * t * Math.exp(-x * x);
-
-    return sign * y;
+// P(X ≤ x) para cada valor pedido, num único pedido
+async function normalCDF(values, mean = 0, std = 1) {
+    const start = Math.min(...values);
+    const stop = Math.max(...values);
+    const result = await fetchDistribution('normal', { mean, std }, { start, stop, points: 2 });
+    return values.map(x => x === start ? result.cdf[0] : result.cdf[1]);
 }
 
 document.addEventListener('DOMContentLoaded', () => {
@@ -152,8 +141,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
     function updateResult() {
         resultContainer.classList.add('updating');
-        setTimeout(() => {
-            calculateProbability();
+        setTimeout(async () => {
+            await calculateProbability();
             resultContainer.classList.remove('updating');
         }, 150);
     }
@@ -256,7 +245,11 @@ document.addEventListener('DOMContentLoaded', () => {
         updateDistributionChart();
     });
 
-    function calculateProbability() {
+    // Contador de pedidos, para mostrar só o resultado do cálculo mais recente
+    let calculationId = 0;
+
+    async function calculateProbability() {
+        const requestId = ++calculationId;
         let probability;
         let explanation;
 
@@ -270,7 +263,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     if (k > n) throw new Error(window.translations?.general?.calculator_errors?.k_greater_than_n || 'k não pode ser maior que n');
                     if (p < 0 || p > 1) throw new Error(window.translations?.general?.calculator_errors?.p_out_of_range || 'p deve estar entre 0 e 1');
 
-                    probability = binomialProbability(n, p, k);
+                    probability = await binomialProbability(n, p, k);
                     explanation = `P(X = ${k}) = C(${n},${k}) × ${p}^${k} × (1-${p})^${n - k}`;
                     break;
 
@@ -280,7 +273,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
                     if (lambda < 0) throw new Error(window.translations?.general?.calculator_errors?.lambda_negative || 'λ deve ser positivo');
 
-                    probability = poissonProbability(lambda, kPoisson);
+                    probability = await poissonProbability(lambda, kPoisson);
                     explanation = `P(X = ${kPoisson}) = (${lambda}^${kPoisson} × e^-${lambda}) / ${kPoisson}!`;
                     break;
 
@@ -294,18 +287,22 @@ document.addEventListener('DOMContentLoaded', () => {
 
                     if (probType === 'between') {
                         const x2 = parseFloat(document.getElementById('x2').value);
-                        probability = normalCDF(x2, mean, std) - normalCDF(x, mean, std);
+                        const [cdfX, cdfX2] = await normalCDF([x, x2], mean, std);
+                        probability = cdfX2 - cdfX;
                         explanation = `P(${x} ≤ X ≤ ${x2}) = P(X ≤ ${x2}) - P(X ≤ ${x})`;
                     } else {
-                        probability = probType === 'less' ? normalCDF(x, mean, std) : 1 - normalCDF(x, mean, std);
+                        const [cdfX] = await normalCDF([x], mean, std);
+                        probability = probType === 'less' ? cdfX : 1 - cdfX;
                         explanation = probType === 'less' ? `P(X ≤ ${x})` : `P(X > ${x})`;
                     }
                     break;
             }
 
+            if (requestId !== calculationId) return;
             resultValue.textContent = probability.toFixed(6);
             resultExplanation.textContent = explanation;
         } catch (error) {
+            if (requestId !== calculationId) return;
             resultValue.textContent = window.translations?.general?.error || 'Erro';
             resultExplanation.textContent = error.message;
         }
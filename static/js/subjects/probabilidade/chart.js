@@ -1,51 +1,27 @@
-// Função para gerar dados do gráfico
-function generateChartData(distribution, params) {
-    const data = [];
-    switch (distribution) {
-        case 'binomial':
-            const { n, p } = params;
-            for (let k = 0; k <= n; k++) {
-                data.push({
-                    x: k,
-                    y: binomialProbability(n, p, k)
-                });
-            }
-            break;
-
-        case 'poisson':
-            const { lambda } = params;
-            const maxK = Math.ceil(lambda + 4 * Math.sqrt(lambda));
-            for (let k = 0; k <= maxK; k++) {
-                data.push({
-                    x: k,
-                    y: poissonProbability(lambda, k)
-                });
-            }
-            break;
+// Contador de pedidos, para ignorar respostas que cheguem fora de ordem
+let chartRequestId = 0;
 
-        case 'normal':
-            const { mean, std } = params;
-            const range = 4 * std;
-            for (let x = mean - range; x <= mean + range; x += std / 10) {
-                data.push({
-                    x: x,
-                    y: normalPDF(x, mean, std)
-                });
-            }
-            break;
-    }
-    return data;
-}
-
-// Função de densidade de probabilidade normal
-function normalPDF(x, mean = 0, std = 1) {
-    return (1 / (std * Math.sqrt(2 * Math.PI))) *
-        Math.exp(-0.5 * Math.pow((x - mean) / std, 2));
+// Função para gerar dados do gráfico (calculados no servidor)
+async function generateChartData(distribution, params) {
+    const result = await fetchDistribution(distribution, params);
+    const values = result.discrete ? result.pmf : result.pdf;
+    return result.x.map((x, i) => ({
+        x: result.discrete ? x : Number(x.toFixed(4)),
+        y: values[i]
+    }));
 }
 
 // Função para atualizar o gráfico
-function updateChart(chart, distribution, params) {
-    const data = generateChartData(distribution, params);
+async function updateChart(chart, distribution, params) {
+    const requestId = ++chartRequestId;
+    let data;
+    try {
+        data = await generateChartData(distribution, params);
+    } catch (error) {
+        console.error('Error loading distribution:', error);
+        return;
+    }
+    if (requestId !== chartRequestId) return;
 
     chart.data.labels = data.map(point => point.x);
     chart.data.datasets[0].data = data.map(point => point.y);
@@ -37,14 +37,14 @@ function initializePodcastPlayers() {
         const episodeTitle = playerElement.getAttribute('data-title');
         const episodeNumber = playerElement.closest('.podcast-card').getAttribute('data-episode');
 
-        // Add loading state
-        playerElement.closest('.podcast-card').classList.add('loading');
+        // Duration comes from the server, so the audio is only downloaded once it's played
+        playerElement.knownDuration = parseFloat(playerElement.getAttribute('data-duration')) || 0;
 
         // Create Howl instance for this player
         const player = new Howl({
             src: [audioSrc],
             html5: true,
-            preload: true,
+            preload: false,
             volume: 1.0,  // Set initial volume
             onload: function () {
                 // Remove loading state
@@ -155,9 +155,21 @@ function initializePodcastPlayers() {
             title: episodeTitle
         };
 
+        // Show the saved position and the waveform before anything is downloaded
+        const savedPosition = parseFloat(localStorage.getItem(`podcast_${episodeNumber}_position`)) || 0;
+        if (playerElement.knownDuration) {
+            playerElement.querySelector('.time-display').textContent =
+                `${formatTime(savedPosition)} / ${formatTime(playerElement.knownDuration)}`;
+            updateProgressBar(playerElement, player, savedPosition / playerElement.knownDuration * 100);
+        }
+        loadWaveform(playerElement);
+
         // Setup play button click
         const playButton = playerElement.querySelector('.play-button');
         playButton.addEventListener('click', function () {
+            if (player.state() === 'unloaded') {
+                playerElement.closest('.podcast-card').classList.add('loading');
+            }
             togglePlayback(player, playerElement);
         });
 
@@ -167,22 +179,43 @@ function initializePodcastPlayers() {
 
         let isDragging = false;
 
-        // Progress bar click
-        progressBar.addEventListener('click', function (e) {
-            if (!isDragging && player.state() === 'loaded') {
-                const rect = progressBar.getBoundingClientRect();
-                const percent = (e.clientX - rect.left) / rect.width;
+        function seekToPercent(percent) {
+            if (player.state() === 'loaded') {
                 const seekPosition = player.duration() * percent;
                 player.seek(seekPosition);
                 updateProgressBar(playerElement, player);
+            } else if (playerElement.knownDuration) {
+                // Not downloaded yet: onload seeks to the saved position once it is
+                localStorage.setItem(`podcast_${episodeNumber}_position`, playerElement.knownDuration * percent);
+                updateProgressBar(playerElement, player, percent * 100);
+                playerElement.closest('.podcast-card').classList.add('loading');
+            } else {
+                return;
+            }
 
-                // If player is not playing, start playing
-                if (!player.playing()) {
-                    player.play();
-                }
+            // If player is not playing, start playing
+            if (!player.playing()) {
+                player.play();
+            }
+        }
+
+        // Progress bar click
+        progressBar.addEventListener('click', function (e) {
+            if (!isDragging) {
+                const rect = progressBar.getBoundingClientRect();
+                seekToPercent((e.clientX - rect.left) / rect.width);
             }
         });
 
+        // Clicking the waveform seeks too
+        const waveform = playerElement.querySelector('.waveform');
+        if (waveform) {
+            waveform.addEventListener('click', function (e) {
+                const rect = waveform.getBoundingClientRect();
+                seekToPercent(Math.max(0, Math.min(1, (e.clientX - rect.left) / rect.width)));
+            });
+        }
+
         // Thumb drag functionality
         progressThumb.addEventListener('mousedown', function (e) {
             e.preventDefault();
@@ -432,6 +465,8 @@ function updateProgressBar(playerElement, player, overrideValue = null) {
         timeDisplay.textContent = `${currentTime} / ${totalTime}`;
     }
 
+    drawWaveform(playerElement, percent);
+
     // If this is the currently playing track, update minimized player too
     if (window.podcastState.currentlyPlaying === player) {
         updateMinimizedProgress(percent);
@@ -564,6 +599,69 @@ function setupKeyboardControls() {
     });
 }
 
+// Fetch the episode's precomputed waveform; while the server is still computing it, ask again later
+function loadWaveform(playerElement, attempt = 0) {
+    const peaksUrl = playerElement.getAttribute('data-peaks');
+    const canvas = playerElement.querySelector('.waveform');
+    if (!peaksUrl || !canvas) return;
+
+    // About one bar every 4 pixels
+    const points = Math.max(32, Math.min(400, Math.round(canvas.clientWidth / 4)));
+    fetch(`${peaksUrl}?points=${points}`)
+        .then(response => {
+            if (response.status === 202 && attempt < 10) {
+                const retryAfter = parseFloat(response.headers.get('Retry-After')) || 2;
+                setTimeout(() => loadWaveform(playerElement, attempt + 1), retryAfter * 1000);
+                return null;
+            }
+            return response.ok ? response.json() : null;
+        })
+        .then(data => {
+            if (!data) return;
+            playerElement.peaks = data.peaks;
+            if (!playerElement.knownDuration && data.duration) {
+                playerElement.knownDuration = data.duration;
+                const durationElement = playerElement.closest('.podcast-card').querySelector('.duration-text');
+                if (durationElement) {
+                    durationElement.textContent = formatTime(data.duration);
+                }
+            }
+            const indicator = playerElement.querySelector('.progress-indicator');
+            drawWaveform(playerElement, parseFloat(indicator && indicator.style.width) || 0);
+        })
+        .catch(error => console.error('Error loading waveform:', error));
+}
+
+// Draw the waveform bars, the ones before `percent` in the episode's color
+function drawWaveform(playerElement, percent) {
+    const canvas = playerElement.querySelector('.waveform');
+    const peaks = playerElement.peaks;
+    if (!canvas || !peaks || !peaks.length) return;
+
+    const ratio = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth;
+    const height = canvas.clientHeight;
+    if (canvas.width !== Math.round(width * ratio) || canvas.height !== Math.round(height * ratio)) {
+        canvas.width = Math.round(width * ratio);
+        canvas.height = Math.round(height * ratio);
+    }
+
+    const context = canvas.getContext('2d');
+    context.setTransform(ratio, 0, 0, ratio, 0, 0);
+    context.clearRect(0, 0, width, height);
+
+    const cover = playerElement.closest('.podcast-card').querySelector('.podcast-cover');
+    const playedColor = (cover && getComputedStyle(cover).getPropertyValue('--color').trim()) || '#4361ee';
+    const loudest = Math.max(...peaks) || 1;
+    const barWidth = width / peaks.length;
+
+    peaks.forEach((peak, index) => {
+        const barHeight = Math.max(1, (peak / loudest) * height);
+        context.fillStyle = (index + 0.5) / peaks.length * 100 <= percent ? playedColor : 'rgba(128, 128, 128, 0.4)';
+        context.fillRect(index * barWidth, (height - barHeight) / 2, Math.max(1, barWidth - 1), barHeight);
+    });
+}
+
 // Format time utility
 function formatTime(seconds) {
     if (!seconds || isNaN(seconds)) return '0:00';
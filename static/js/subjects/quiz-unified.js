@@ -6,12 +6,16 @@
 class UnifiedQuizSystem {
     constructor() {
         this.quizData = null;
+        this.explanations = {};
+        this.explanationsRequest = null;
         this.currentQuestions = [];
         this.currentQuestionIndex = 0;
         this.score = 0;
         this.quizType = null;
         this.startTime = null;
         this.endTime = null;
+        // Answers not sent to the server yet
+        this.pendingAnswers = [];
 
         // DOM elements
         this.elements = {
@@ -66,6 +70,9 @@ class UnifiedQuizSystem {
         // Bind events
         this.bindEvents();
 
+        // Send the answers of a quiz left unfinished
+        window.addEventListener('pagehide', () => this.sendAnswers());
+
         // Load quiz data
         this.loadQuiz();
     }
@@ -110,14 +117,23 @@ class UnifiedQuizSystem {
 
     async loadQuiz() {
         try {
-            console.log(`Loading quiz data for type: ${this.quizType}`);
-            this.quizData = await QuizUtils.loadQuizData(this.quizType);
+            console.log(`Loading quiz session for type: ${this.quizType}`);
+            const quizData = await QuizUtils.loadQuizSession(this.quizType);
 
-            if (!this.quizData) {
+            if (!quizData) {
                 throw new Error('Failed to load quiz data');
             }
 
-            console.log(`Quiz loaded successfully with ${this.quizData.questions.length} questions`);
+            this.quizData = quizData;
+            this.explanations = {};
+            // Fetch the explanations for this session in the background
+            this.explanationsRequest = QuizUtils.loadExplanations(this.quizType, quizData.questions.map(q => q.id))
+                .then(explanations => {
+                    this.explanations = explanations;
+                })
+                .catch(error => console.warn('Could not load explanations:', error));
+
+            console.log(`Quiz session loaded with ${quizData.questions.length} of ${quizData.total} questions`);
         } catch (error) {
             console.error('Error loading quiz:', error);
             this.showError(window.translations?.general?.error_loading_quiz || 'Não foi possível carregar o quiz. Por favor, tente novamente.');
@@ -133,12 +149,13 @@ class UnifiedQuizSystem {
         console.log('Starting quiz...');
 
         // Reset state
+        this.sendAnswers();
         this.currentQuestionIndex = 0;
         this.score = 0;
         this.startTime = new Date();
 
-        // Use questionsPerSession from quiz data, fallback to 10
-        const questionsPerSession = this.quizData.questionsPerSession || 10;
+        // The server already sampled questionsPerSession questions for this session
+        const questionsPerSession = this.quizData.questions.length;
 
         // Prepare questions
         try {
@@ -205,7 +222,14 @@ class UnifiedQuizSystem {
         }
     }
 
-    selectAnswer(selectedIndex) {
+    async getExplanation(question) {
+        if (!(question.id in this.explanations) && this.explanationsRequest) {
+            await this.explanationsRequest;
+        }
+        return this.explanations[question.id] || '';
+    }
+
+    async selectAnswer(selectedIndex) {
         const question = this.currentQuestions[this.currentQuestionIndex];
         const isCorrect = selectedIndex === question.correctAnswer;
 
@@ -225,8 +249,13 @@ class UnifiedQuizSystem {
             this.score++;
         }
 
+        this.pendingAnswers.push({
+            id: question.id,
+            selected: question.optionOrder ? question.optionOrder[selectedIndex] : selectedIndex
+        });
+
         // Show feedback
-        QuizUtils.showFeedback(isCorrect, question.explanation);
+        QuizUtils.showFeedback(isCorrect, await this.getExplanation(question));
 
         // Update score display
         QuizUtils.updateProgress(this.currentQuestionIndex, this.currentQuestions.length, this.score);
@@ -244,8 +273,14 @@ class UnifiedQuizSystem {
         }
     }
 
+    sendAnswers() {
+        QuizUtils.submitAttempts(this.quizType, this.pendingAnswers);
+        this.pendingAnswers = [];
+    }
+
     showResults() {
         this.endTime = new Date();
+        this.sendAnswers();
         const percentage = Math.round((this.score / this.currentQuestions.length) * 100);
 
         // Show results section
@@ -288,6 +323,9 @@ class UnifiedQuizSystem {
         // Show start section
         this.showSection('start');
 
+        // Sample a fresh set of questions for the next attempt
+        this.loadQuiz();
+
         console.log('Quiz restarted');
     }
 
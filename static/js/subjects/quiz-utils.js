@@ -50,16 +50,188 @@ class QuizUtils {
             }
 
             const correctAnswerText = question.options[question.correctAnswer];
-            const shuffledOptions = this.shuffleArray(question.options);
+            // Shuffle indices, so answers can be reported with the options' positions in the quiz file
+            const optionOrder = this.shuffleArray(question.options.map((option, index) => index));
 
-            question.options = shuffledOptions;
-            question.correctAnswer = shuffledOptions.indexOf(correctAnswerText);
+            question.options = optionOrder.map(index => question.options[index]);
+            question.correctAnswer = optionOrder.indexOf(question.correctAnswer);
             question.correctAnswerText = correctAnswerText;
+            question.optionOrder = optionOrder;
         });
 
         return shuffledQuestions;
     }
 
+    /**
+     * Get the locale of the current page from its URL prefix (e.g. /en_US/probabilidade/quiz)
+     * @returns {string|null} - Locale, or null for pages without a prefix
+     */
+    static getLocale() {
+        const prefix = window.location.pathname.split('/')[1];
+        return /^[a-z]{2}_[A-Z]{2}$/.test(prefix) ? prefix : null;
+    }
+
+    /**
+     * Get the API base URL of a quiz for the current subject
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @returns {string} - Quiz API URL
+     */
+    static getQuizUrl(quizType) {
+        // Get current subject from URL path, after the locale prefix
+        const pathParts = window.location.pathname.split('/').filter(Boolean);
+        if (this.getLocale()) {
+            pathParts.shift();
+        }
+        const subject = pathParts[0] || 'probabilidade'; // fallback to probabilidade
+
+        return `/api/quiz/${subject}/${quizType}`;
+    }
+
+    /**
+     * Add the page's locale to an API URL, so responses don't depend on cookies
+     * @param {string} url - API URL, with or without a query string
+     * @returns {string} - URL with ?locale= when the page has a locale
+     */
+    static withLocale(url) {
+        const locale = this.getLocale();
+        if (!locale) {
+            return url;
+        }
+        return `${url}${url.includes('?') ? '&' : '?'}locale=${locale}`;
+    }
+
+    /**
+     * Load the full quiz written by `flask export` to /<locale>/api/quiz/<subject>/<type>.json.
+     * A static copy of the site has no session or explanations endpoints, so this is their fallback.
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @returns {Promise<Object>} - Full quiz data, including explanations
+     */
+    static loadStaticQuiz(quizType) {
+        this.staticQuizzes = this.staticQuizzes || {};
+        if (!this.staticQuizzes[quizType]) {
+            const locale = this.getLocale();
+            const url = locale ? `/${locale}${this.getQuizUrl(quizType)}.json` : null;
+            this.staticQuizzes[quizType] = (url ? fetch(url) : Promise.reject(new Error('Page has no locale')))
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`Failed to fetch static quiz: ${response.status} ${response.statusText}`);
+                    }
+                    return response.json();
+                });
+            // Let a later call try again
+            this.staticQuizzes[quizType].catch(() => delete this.staticQuizzes[quizType]);
+        }
+        return this.staticQuizzes[quizType];
+    }
+
+    /**
+     * Sample a session from the static quiz, like the server's /session endpoint does
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @returns {Promise<Object>} - Quiz data with the sampled questions, without explanations
+     */
+    static async loadStaticQuizSession(quizType) {
+        const quizData = await this.loadStaticQuiz(quizType);
+        const questions = this.shuffleArray(quizData.questions || [])
+            .slice(0, quizData.questionsPerSession || 10)
+            .map(({ explanation, ...question }) => question);
+        return { ...quizData, total: (quizData.questions || []).length, questions };
+    }
+
+    /**
+     * Load a session of questions sampled on the server (without explanations)
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @returns {Promise<Object>} - Quiz data with the sampled questions
+     */
+    static async loadQuizSession(quizType) {
+        try {
+            let response = null;
+            try {
+                response = await fetch(this.withLocale(`${this.getQuizUrl(quizType)}/session`));
+            } catch (error) {
+                console.warn('Quiz session endpoint unreachable:', error);
+            }
+
+            let data;
+            if (response && response.ok) {
+                data = await response.json();
+            } else {
+                // Static export: there is no API, only the exported quiz file
+                try {
+                    data = await this.loadStaticQuizSession(quizType);
+                } catch (error) {
+                    throw new Error(response
+                        ? `Failed to fetch quiz session: ${response.status} ${response.statusText}`
+                        : `Failed to fetch quiz session: ${error.message}`);
+                }
+            }
+
+            if (!data.questions || !Array.isArray(data.questions) || data.questions.length === 0) {
+                throw new Error('No questions found in quiz data');
+            }
+
+            return data;
+        } catch (error) {
+            console.error('Error loading quiz session:', error);
+            throw error;
+        }
+    }
+
+    /**
+     * Load the explanations for a set of questions
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @param {Array} ids - Question ids
+     * @returns {Promise<Object>} - Explanations keyed by question id
+     */
+    static async loadExplanations(quizType, ids) {
+        let response = null;
+        try {
+            response = await fetch(this.withLocale(`${this.getQuizUrl(quizType)}/explanations?ids=${ids.join(',')}`));
+        } catch (error) {
+            console.warn('Explanations endpoint unreachable:', error);
+        }
+
+        if (response && response.ok) {
+            return response.json();
+        }
+
+        // Static export: take the explanations from the exported quiz file
+        try {
+            const quizData = await this.loadStaticQuiz(quizType);
+            const wanted = new Set(ids.map(String));
+            const explanations = {};
+            (quizData.questions || []).forEach((question, index) => {
+                const id = String(question.id ?? index);
+                if (wanted.has(id)) {
+                    explanations[id] = question.explanation || '';
+                }
+            });
+            return explanations;
+        } catch (error) {
+            throw new Error(response
+                ? `Failed to fetch explanations: ${response.status} ${response.statusText}`
+                : `Failed to fetch explanations: ${error.message}`);
+        }
+    }
+
+    /**
+     * Send answered questions to the per-question statistics, without waiting for a response
+     * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
+     * @param {Array} answers - {id, selected} pairs, with option indices as in the quiz file
+     */
+    static submitAttempts(quizType, answers) {
+        if (!answers || answers.length === 0) {
+            return;
+        }
+
+        // keepalive lets the request finish while the page is being closed
+        fetch(`${this.getQuizUrl(quizType)}/attempts`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers }),
+            keepalive: true
+        }).catch(error => console.warn('Could not send quiz answers:', error));
+    }
+
     /**
      * Load quiz data from API
      * @param {string} quizType - Type of quiz (e.g., 'quiz', 'descobrir')
@@ -67,11 +239,7 @@ class QuizUtils {
      */
     static async loadQuizData(quizType) {
         try {
-            // Get current subject from URL path
-            const pathParts = window.location.pathname.split('/');
-            const subject = pathParts[1] || 'probabilidade'; // fallback to probabilidade
-
-            const response = await fetch(`/api/quiz/${subject}/${quizType}`);
+            const response = await fetch(this.withLocale(this.getQuizUrl(quizType)));
 
             if (!response.ok) {
                 throw new Error(`Failed to fetch quiz data: ${response.status} ${response.statusText}`);
@@ -0,0 +1,108 @@
+import json
+import math
+
+import pytest
+
+from utils.distributions import MAX_POINTS, DistributionError, ResultCache, _discrete_cdf, evaluate
+
+
+def evaluate_json(name, params, start=None, stop=None, quantiles=()):
+    return json.loads(evaluate(name, params, start, stop, 81, quantiles))
+
+
+def reference_cdf(ratio, mode, top):
+    """Exact-enough CDF from the PMF ratio recurrence, normalized around the mode"""
+    pmf = [0.0] * (top + 1)
+    pmf[mode] = 1.0
+    for k in range(mode, top):
+        pmf[k + 1] = pmf[k] * ratio(k)
+    for k in range(mode, 0, -1):
+        pmf[k - 1] = pmf[k] / ratio(k - 1)
+    total = math.fsum(pmf)
+    cumulative, cdf = 0.0, []
+    for p in pmf:
+        cumulative += p / total
+        cdf.append(cumulative)
+    return cdf
+
+
+@pytest.mark.parametrize('n, p', [(50, 0.3), (1000, 0.01), (20000, 0.3)])
+def test_binomial_cdf_matches_summed_pmf(n, p):
+    cdf = reference_cdf(lambda k: (n - k) / (k + 1) * p / (1 - p), int(n * p), n)
+    for k in range(0, n, max(1, n // 50)):
+        if cdf[k] > 1e-250:
+            assert _discrete_cdf('binomial', (n, p), k) == pytest.approx(cdf[k], rel=1e-10, abs=1e-14)
+
+
+@pytest.mark.parametrize('lam', [0.5, 7.0, 150.0, 40000.0])
+def test_poisson_cdf_matches_summed_pmf(lam):
+    top = int(lam + 40 * math.sqrt(lam) + 50)
+    cdf = reference_cdf(lambda k: lam / (k + 1), int(lam), top)
+    for k in range(0, top, max(1, top // 50)):
+        if cdf[k] > 1e-250:
+            assert _discrete_cdf('poisson', (lam,), k) == pytest.approx(cdf[k], rel=1e-10, abs=1e-14)
+
+
+@pytest.mark.parametrize('name, params', [('binomial', (1e10, 0.5)), ('poisson', (1e10,)), ('binomial', (1e7, 0.5))])
+def test_default_range_of_wide_distributions(name, params):
+    result = evaluate_json(name, params)
+    mean = result['mean']
+    assert len(result['x']) == MAX_POINTS
+    assert result['x'][0] <= mean <= result['x'][-1]
+    assert all(a <= b for a, b in zip(result['cdf'], result['cdf'][1:]))
+    # The range is the middle of the distribution, so the CDF straddles 1/2
+    assert 0 < result['cdf'][0] < 0.5 < result['cdf'][-1] < 1
+
+
+def test_single_point_of_huge_poisson():
+    lam = 1e9
+    result = evaluate_json('poisson', (lam,), lam, lam)
+    assert result['x'] == [lam]
+    # Normal approximation with continuity correction, exact to O(1/lambda) here
+    assert result['pmf'][0] == pytest.approx(1 / math.sqrt(2 * math.pi * lam), rel=1e-6)
+    assert result['cdf'][0] == pytest.approx(0.5 + 2 / 3 / math.sqrt(2 * math.pi * lam), rel=1e-6)
+
+
+@pytest.mark.parametrize('name, params', [('binomial', (1e10, 0.5)), ('poisson', (1e9,)), ('binomial', (200, 0.1)),
+                                          ('poisson', (3.5,)), ('geometric', (0.2,)), ('hypergeometric', (50, 10, 20))])
+def test_quantiles_are_the_smallest_k_reaching_q(name, params):
+    quantiles = (0.025, 0.5, 0.975)
+    result = evaluate_json(name, params, quantiles=quantiles)
+    for q in quantiles:
+        k = result['quantiles'][str(q)]
+        assert _discrete_cdf(name, params, k) >= q - 1e-12
+        assert _discrete_cdf(name, params, k - 1) < q
+
+
+def test_degenerate_distributions():
+    assert evaluate_json('hypergeometric', (0, 0, 0))['pmf'] == [1.0]
+    result = evaluate_json('poisson', (0.0,), 0, 3, quantiles=(0.5,))
+    assert result['pmf'] == [1.0, 0.0, 0.0, 0.0]
+    assert result['quantiles'] == {'0.5': 0}
+
+
+def test_tiny_geometric_p_reports_an_unbounded_variance():
+    result = evaluate_json('geometric', (1e-300,), 1, 3)
+    assert result['variance'] is None
+    assert result['pmf'][0] == pytest.approx(1e-300)
+
+
+@pytest.mark.parametrize('name, params', [('binomial', (1e300, 0.3)), ('geometric', (5e-324,)),
+                                          ('exponential', (1e-200,))])
+def test_parameters_beyond_float_range_are_rejected(name, params):
+    with pytest.raises(DistributionError):
+        evaluate(name, params)
+
+
+def test_result_cache_is_bounded_by_size():
+    cache = ResultCache(100)
+    cache.put('a', b'x' * 40)
+    cache.put('b', b'x' * 40)
+    assert cache.get('a') is not None
+    cache.put('c', b'x' * 40)
+    # 'b' was the least recently used
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    cache.put('huge', b'x' * 101)
+    assert cache.get('huge') is None
+    assert cache.size == 80
@@ -0,0 +1,294 @@
+import os
+import re
+import json
+import hashlib
+import posixpath
+import threading
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+from utils.compression import Variants, compress
+
+# Werkzeug appends the utf-8 charset to text types
+MIMETYPES = {
+    '.css': 'text/css',
+    '.js': 'text/javascript'
+}
+
+# Quoted strings are copied verbatim by the minifiers
+_CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_RELATIVE_URL = re.compile(r'url\(\s*([\'"]?)(?![\'"]?(?:data:|https?:|/))([^\'")]+)\1\s*\)')
+
+
+class Asset(NamedTuple):
+    """A built bundle, addressed by its content-hashed filename"""
+    filename: str
+    body: bytes
+    mimetype: str
+    etag: str
+    # The body, precompressed for each content coding
+    variants: Variants
+
+
+def minify_css(source: str) -> str:
+    """Strip comments and redundant whitespace, leaving strings untouched"""
+    source = _CSS_COMMENT.sub('', source)
+    parts = _CSS_STRING.split(source)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        code = re.sub(r':\s+', ':', code)
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+# A / after one of these (or after a keyword like `return`) starts a regular expression, not a division
+_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = frozenset(('return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new', 'delete',
+                             'void', 'throw', 'yield', 'await'))
+_JS_WORD_END = re.compile(r'[A-Za-z_$][\w$]*$')
+
+# Inside template text; open ${ } expressions are kept on the stack as their brace depth
+_TEMPLATE = 'template'
+
+
+def _regex_allowed(code: str) -> bool:
+    stripped = code.rstrip()
+    if not stripped or stripped[-1] in _REGEX_PRECEDERS:
+        return True
+    word = _JS_WORD_END.search(stripped)
+    return word is not None and word.group(0) in _REGEX_KEYWORDS
+
+
+def minify_js(source: str) -> str:
+    """Conservatively shrink JavaScript: drop comments, indentation and blank lines.
+
+    The source is scanned character by character, tracking strings, template
+    literals (with nested ${} expressions), regular expressions and comments, so
+    comment markers inside literals are left alone and code sharing a line with a
+    comment is kept. Line breaks are kept so automatic semicolon insertion is not
+    affected, and text inside multi-line template literals is copied verbatim.
+    """
+    # (text, starts inside a literal, ends inside a literal) for each output line
+    lines: List[Tuple[str, bool, bool]] = []
+    line: List[str] = []
+    line_starts_in_literal = False
+    stack: List[object] = []
+    string_quote: Optional[str] = None
+    i, length = 0, len(source)
+
+    def end_line(in_literal: bool):
+        nonlocal line, line_starts_in_literal
+        lines.append((''.join(line), line_starts_in_literal, in_literal))
+        line = []
+        line_starts_in_literal = in_literal
+
+    while i < length:
+        char = source[i]
+        if string_quote is not None or (stack and stack[-1] == _TEMPLATE):
+            # Inside a string or template text: copy everything, including escapes
+            if char == '\\' and i + 1 < length:
+                line.append(char)
+                if source[i + 1] == '\n':
+                    end_line(True)
+                else:
+                    line.append(source[i + 1])
+                i += 2
+                continue
+            if char == '\n':
+                end_line(True)
+                i += 1
+                continue
+            line.append(char)
+            if string_quote is not None:
+                if char == string_quote:
+                    string_quote = None
+            elif char == '`':
+                stack.pop()
+            elif char == '$' and source.startswith('{', i + 1):
+                line.append('{')
+                stack.append(0)
+                i += 1
+            i += 1
+            continue
+
+        if char == '\n':
+            end_line(False)
+        elif char in '\'"':
+            string_quote = char
+            line.append(char)
+        elif char == '`':
+            stack.append(_TEMPLATE)
+            line.append(char)
+        elif char == '{':
+            if stack:
+                stack[-1] += 1
+            line.append(char)
+        elif char == '}':
+            if stack and stack[-1] == 0:
+                # Closes a ${ } expression: back to template text
+                stack.pop()
+            elif stack:
+                stack[-1] -= 1
+            line.append(char)
+        elif source.startswith('//', i):
+            newline = source.find('\n', i)
+            i = length if newline == -1 else newline
+            continue
+        elif source.startswith('/*', i):
+            close = source.find('*/', i + 2)
+            close = length if close == -1 else close + 2
+            # Keep a line break the comment contained, for automatic semicolon insertion
+            if '\n' in source[i:close]:
+                end_line(False)
+            else:
+                line.append(' ')
+            i = close
+            continue
+        elif char == '/' and _regex_allowed(''.join(line) or (lines[-1][0] if lines else '')):
+            # Copy the regular expression up to its closing slash, skipping escapes and [classes]
+            j, in_class = i + 1, False
+            while j < length and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 2
+                    continue
+                if source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            line.append(source[i:j + 1])
+            i = j + 1
+            continue
+        else:
+            line.append(char)
+        i += 1
+    end_line(False)
+
+    output: List[str] = []
+    for text, starts_in_literal, ends_in_literal in lines:
+        if not starts_in_literal:
+            text = text.lstrip()
+        if not ends_in_literal:
+            text = text.rstrip()
+        if text or starts_in_literal or ends_in_literal:
+            output.append(text)
+    return '\n'.join(output)
+
+
+class AssetPipeline:
+    """Concatenates, minifies and fingerprints the CSS/JS bundles listed in a bundles file.
+
+    Bundles are built in memory at startup and rebuilt when a source file changes.
+    Each one gets a content-hashed filename, so it can be served as immutable.
+    """
+
+    def __init__(self, static_folder: str, bundles_file: str, static_url_path: str = '/static'):
+        self.static_folder = static_folder
+        self.bundles_file = bundles_file
+        self.static_url_path = static_url_path
+        self.version = 0
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[Tuple[str, int], ...]] = None
+        self._manifest: Mapping[str, str] = MappingProxyType({})
+        self._assets: Mapping[str, Asset] = MappingProxyType({})
+        self._bundles: Mapping[str, Tuple[str, ...]] = MappingProxyType({})
+        self.refresh()
+
+    def _load_bundles(self) -> Dict[str, List[str]]:
+        with open(self.bundles_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _source_signature(self, bundles: Dict[str, List[str]]) -> Tuple[Tuple[str, int], ...]:
+        paths = [self.bundles_file] + sorted({
+            os.path.join(self.static_folder, source) for sources in bundles.values() for source in sources
+        })
+        return tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+
+    def refresh(self) -> bool:
+        """Rebuild every bundle if the bundles file or any source changed. Returns True if rebuilt."""
+        with self._lock:
+            try:
+                bundles = self._load_bundles()
+                signature = self._source_signature(bundles)
+            except (OSError, ValueError) as e:
+                print(f"Error reading asset bundles: {e}")
+                return False
+
+            if signature == self._signature:
+                return False
+
+            manifest: Dict[str, str] = {}
+            assets: Dict[str, Asset] = {}
+            for name, sources in bundles.items():
+                asset = self._build_bundle(name, sources)
+                manifest[name] = asset.filename
+                assets[asset.filename] = asset
+
+            self._manifest = MappingProxyType(manifest)
+            self._assets = MappingProxyType(assets)
+            self._bundles = MappingProxyType({name: tuple(sources) for name, sources in bundles.items()})
+            self._signature = signature
+            self.version += 1
+            return True
+
+    def current_version(self) -> int:
+        """Rebuild if needed and return a number that changes whenever the bundles do"""
+        self.refresh()
+        return self.version
+
+    def _read_source(self, source: str) -> str:
+        with open(os.path.join(self.static_folder, source), 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        if source.endswith('.css'):
+            # Bundles are served from another folder, so relative urls must become absolute
+            base = posixpath.join(self.static_url_path, posixpath.dirname(source))
+            content = _CSS_RELATIVE_URL.sub(
+                lambda m: f'url({m.group(1)}{posixpath.normpath(posixpath.join(base, m.group(2)))}{m.group(1)})',
+                content
+            )
+            return minify_css(content)
+        return minify_js(content)
+
+    def _build_bundle(self, name: str, sources: List[str]) -> Asset:
+        stem, extension = os.path.splitext(name)
+        # Separate scripts with a semicolon so one file can't run into the next
+        separator = '\n' if extension == '.css' else ';\n'
+        body = separator.join(self._read_source(source) for source in sources).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        return Asset(f'{stem}.{digest}{extension}', body, MIMETYPES[extension], digest, compress(body))
+
+    def url_name(self, bundle: str) -> str:
+        """Get the fingerprinted filename of a bundle"""
+        return self._manifest[bundle]
+
+    def sources(self, bundle: str) -> Tuple[str, ...]:
+        """Source files of a bundle, relative to the static folder"""
+        return self._bundles.get(bundle, ())
+
+    def get(self, filename: str) -> Optional[Asset]:
+        return self._assets.get(filename)
+
+    def write(self, output_dir: str) -> int:
+        """Write every bundle, its .gz variant and a manifest.json to `output_dir`.
+
+        The .gz files let nginx (gzip_static) or a CDN serve compressed bundles as-is.
+        Returns the number of files written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        written = 0
+        for asset in self._assets.values():
+            path = os.path.join(output_dir, asset.filename)
+            with open(path, 'wb') as f:
+                f.write(asset.body)
+            written += 1
+            if 'gzip' in asset.variants:
+                with open(path + '.gz', 'wb') as f:
+                    f.write(asset.variants['gzip'])
+                written += 1
+        with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(dict(self._manifest), f, indent=4)
+        return written + 1
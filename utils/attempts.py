@@ -0,0 +1,225 @@
+import os
+import queue
+import sqlite3
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    quiz_type TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    selected INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    answered_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_stats (
+    subject TEXT NOT NULL,
+    quiz_type TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (subject, quiz_type, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS option_stats (
+    subject TEXT NOT NULL,
+    quiz_type TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    option INTEGER NOT NULL,
+    picks INTEGER NOT NULL,
+    PRIMARY KEY (subject, quiz_type, question_id, option)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_QUESTION = """
+INSERT INTO question_stats (subject, quiz_type, question_id, attempts, correct) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (subject, quiz_type, question_id)
+DO UPDATE SET attempts = attempts + excluded.attempts, correct = correct + excluded.correct
+"""
+
+_UPSERT_OPTION = """
+INSERT INTO option_stats (subject, quiz_type, question_id, option, picks) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (subject, quiz_type, question_id, option)
+DO UPDATE SET picks = picks + excluded.picks
+"""
+
+
+class Attempt(NamedTuple):
+    """One answered question; `selected` is the index in the quiz file, before options are shuffled"""
+    subject: str
+    quiz_type: str
+    question_id: str
+    selected: int
+    correct: bool
+    answered_at: float
+
+
+class QuestionStats(NamedTuple):
+    attempts: int
+    correct: int
+    # Times each option was picked, indexed like the options in the quiz file
+    options: Tuple[int, ...]
+
+    @property
+    def correct_rate(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+
+class AttemptStore:
+    """Write-behind store of quiz answers with running per-question statistics.
+
+    Requests only append to an in-memory queue. A background thread drains it
+    every `flush_interval` seconds and writes the whole batch in one SQLite
+    transaction: the raw attempts, plus upserts of the per-question and
+    per-option counters, so reading the statistics of a question is a primary
+    key lookup instead of a scan. The database runs in WAL mode, so the prefork
+    workers' flushes and reads don't block each other. When the queue is full,
+    answers are dropped rather than slowing the request down.
+
+    Nothing happens on construction: the database is created by the first
+    connection and the flush thread by the first `record()` (or `start()`), so
+    processes that never see an answer, like the CLI commands, leave no trace.
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 2.0, max_pending: int = 10000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_lock = threading.Lock()
+        self._stop_flusher = threading.Event()
+        self._local = threading.local()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=30.0)
+        db.execute('PRAGMA journal_mode=WAL')
+        # With WAL, a commit only has to reach the log; losing the last batch on power loss is acceptable
+        db.execute('PRAGMA synchronous=NORMAL')
+        if not self._schema_ready:
+            # Idempotent, so threads racing here do no harm
+            db.executescript(_SCHEMA)
+            self._schema_ready = True
+        return db
+
+    def record(self, attempts: Iterable[Attempt]) -> int:
+        """Queue attempts for the next flush without blocking. Returns how many were queued."""
+        self.start()
+        queued = 0
+        for attempt in attempts:
+            try:
+                self._queue.put_nowait(attempt)
+                queued += 1
+            except queue.Full:
+                self.dropped += 1
+        return queued
+
+    def flush(self) -> int:
+        """Write everything queued so far in one transaction. Returns the number of attempts written."""
+        with self._flush_lock:
+            batch: List[Attempt] = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return 0
+
+            questions: Counter = Counter()
+            correct: Counter = Counter()
+            options: Counter = Counter()
+            for attempt in batch:
+                key = (attempt.subject, attempt.quiz_type, attempt.question_id)
+                questions[key] += 1
+                correct[key] += attempt.correct
+                options[key + (attempt.selected,)] += 1
+
+            try:
+                db = self._connect()
+                try:
+                    with db:
+                        db.executemany(
+                            'INSERT INTO attempts (subject, quiz_type, question_id, selected, correct, answered_at) '
+                            'VALUES (?, ?, ?, ?, ?, ?)',
+                            batch
+                        )
+                        db.executemany(_UPSERT_QUESTION, [key + (count, correct[key]) for key, count in questions.items()])
+                        db.executemany(_UPSERT_OPTION, [key + (count,) for key, count in options.items()])
+                finally:
+                    db.close()
+            except sqlite3.Error as e:
+                print(f"Error writing {len(batch)} quiz attempts: {e}")
+                self.dropped += len(batch)
+                return 0
+            self.written += len(batch)
+            return len(batch)
+
+    def stats(self, subject: str, quiz_type: str,
+              option_counts: Dict[str, int]) -> Dict[str, QuestionStats]:
+        """Statistics of every question of a quiz that has been answered at least once.
+
+        `option_counts` maps question ids to their number of options, so option
+        lists have one entry per option even if some were never picked.
+        """
+        db = self._reader()
+        result: Dict[str, QuestionStats] = {}
+        rows = db.execute(
+            'SELECT question_id, attempts, correct FROM question_stats WHERE subject = ? AND quiz_type = ?',
+            (subject, quiz_type)
+        ).fetchall()
+        picks: Dict[str, Dict[int, int]] = {}
+        for question_id, option, count in db.execute(
+            'SELECT question_id, option, picks FROM option_stats WHERE subject = ? AND quiz_type = ?',
+            (subject, quiz_type)
+        ):
+            picks.setdefault(question_id, {})[option] = count
+        for question_id, attempts, correct in rows:
+            if question_id not in option_counts:
+                # Removed from the quiz since
+                continue
+            counts = picks.get(question_id, {})
+            result[question_id] = QuestionStats(
+                attempts, correct, tuple(counts.get(option, 0) for option in range(option_counts[question_id]))
+            )
+        return result
+
+    def _reader(self) -> sqlite3.Connection:
+        """A connection for this thread, opened again after a fork"""
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = self._connect()
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def start(self):
+        """Flush the queue every `flush_interval` seconds in a daemon thread, unless one is already running."""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        def run():
+            while not self._stop_flusher.wait(self.flush_interval):
+                self.flush()
+
+        with self._flusher_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop_flusher.clear()
+            self._flusher = threading.Thread(target=run, name='attempt-flusher', daemon=True)
+            self._flusher.start()
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still queued (threads don't survive fork)."""
+        with self._flusher_lock:
+            if self._flusher is not None:
+                self._stop_flusher.set()
+                self._flusher.join()
+                self._flusher = None
+        self.flush()
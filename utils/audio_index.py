@@ -0,0 +1,82 @@
+import os
+import wave
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+
+class AudioEntry(NamedTuple):
+    """What the streaming endpoint needs to know about one audio file"""
+    filename: str
+    path: str
+    size: int
+    mtime: float
+    duration: float  # seconds, 0.0 when the file could not be decoded
+
+    @property
+    def etag(self) -> str:
+        return f"{self.size:x}-{int(self.mtime * 1000):x}"
+
+
+def probe_wav(path: str) -> float:
+    """Read the duration of a WAV file from its headers only"""
+    try:
+        with wave.open(path, 'rb') as wav:
+            if wav.getframerate():
+                return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError) as e:
+        print(f"Could not read WAV header of {path}: {e}")
+    return 0.0
+
+
+class AudioIndex:
+    """In-memory index of the episode audio files in the assets folder.
+
+    The index is built at startup and rescanned incrementally: every rescan
+    stats each file, and only files that are new or whose size/mtime changed
+    are probed again. The folder's own mtime isn't enough, since overwriting
+    an episode in place doesn't change it.
+    """
+
+    def __init__(self, assets_path: str):
+        self.assets_path = assets_path
+        self._entries: Mapping[str, AudioEntry] = MappingProxyType({})
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """Rescan the assets folder. Returns True if the index changed."""
+        previous = self._entries
+        entries = {}
+        try:
+            dir_entries = list(os.scandir(self.assets_path))
+        except OSError:
+            dir_entries = []
+        for dir_entry in dir_entries:
+            if not dir_entry.name.endswith('.wav') or not dir_entry.is_file():
+                continue
+            try:
+                stat = dir_entry.stat()
+                entry = previous.get(dir_entry.name)
+                if entry is None or entry.size != stat.st_size or entry.mtime != stat.st_mtime:
+                    entry = self._index_file(dir_entry.name, dir_entry.path, stat)
+                entries[dir_entry.name] = entry
+            except OSError as e:
+                print(f"Error indexing audio file {dir_entry.path}: {e}")
+
+        if entries == previous:
+            return False
+
+        # Swap in the new index in a single assignment
+        self._entries = MappingProxyType(entries)
+        print(f"Indexed {len(entries)} audio files")
+        return True
+
+    def get(self, filename: str) -> Optional[AudioEntry]:
+        return self._entries.get(filename)
+
+    @property
+    def entries(self) -> Mapping[str, AudioEntry]:
+        return self._entries
+
+    @staticmethod
+    def _index_file(filename: str, path: str, stat: os.stat_result) -> AudioEntry:
+        return AudioEntry(filename, path, stat.st_size, stat.st_mtime, probe_wav(path))
@@ -0,0 +1,297 @@
+import os
+import sys
+import time
+import wave
+import struct
+import threading
+import subprocess
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+from utils.audio_index import AudioEntry
+
+# Peaks stored per file; the API max-pools them down to what the page asks for
+PEAK_COUNT = 1024
+
+# Frames read from a WAV file at a time, so long episodes never sit in memory whole
+CHUNK_FRAMES = 65536
+
+# magic, format version, channels, peak count, sample rate, duration, source size, source mtime
+_HEADER = struct.Struct('<4sHHIIdQd')
+_MAGIC = b'PEAK'
+_VERSION = 1
+
+# A claim file older than this was left by a process that died mid-job
+STALE_CLAIM_SECONDS = 600.0
+
+# Directory the decoding jobs run `python -m utils.audio_peaks` from
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Largest sample magnitude of each sample width (24-bit samples are reduced to their top 16 bits)
+_FULL_SCALE = {1: 128, 2: 32768, 3: 32768, 4: 2147483648}
+_TYPECODES = {2: 'h', 3: 'h', 4: 'i'}
+
+
+class Peaks(NamedTuple):
+    """Duration and downsampled waveform of one audio file"""
+    duration: float
+    sample_rate: int
+    channels: int
+    # One byte per bucket: the loudest sample in it, 255 being full scale
+    peaks: bytes
+    # Size and mtime of the file the peaks were computed from
+    size: int
+    mtime: float
+
+    def is_current(self, entry: AudioEntry) -> bool:
+        return self.size == entry.size and self.mtime == entry.mtime
+
+    def downsample(self, points: int) -> bytes:
+        """Max-pool the peaks down to `points` buckets"""
+        count = len(self.peaks)
+        if points >= count:
+            return self.peaks
+        bounds = [i * count // points for i in range(points + 1)]
+        return bytes(max(self.peaks[start:end]) for start, end in zip(bounds, bounds[1:]))
+
+
+def _chunk_peak(data: bytes, width: int) -> int:
+    """Largest sample magnitude in a block of little-endian PCM frames"""
+    if width == 1:
+        # 8-bit WAV samples are unsigned around 128
+        return max(max(data) - 128, 128 - min(data))
+    if width == 3:
+        # Keep the top two bytes of each sample; that's plenty for a waveform
+        samples = bytearray(len(data) // 3 * 2)
+        samples[0::2] = data[1::3]
+        samples[1::2] = data[2::3]
+        data = samples
+    samples = array(_TYPECODES[width], data)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return max(max(samples), -min(samples))
+
+
+def compute_peaks(path: str, count: int = PEAK_COUNT) -> Peaks:
+    """Read a WAV file in chunks and keep the loudest sample of each of `count` buckets"""
+    stat = os.stat(path)
+    with wave.open(path, 'rb') as wav:
+        channels, width, sample_rate, frames = wav.getnchannels(), wav.getsampwidth(), wav.getframerate(), wav.getnframes()
+        if width not in _FULL_SCALE:
+            raise wave.Error(f"unsupported sample width {width}")
+        count = min(count, frames)
+        full_scale = _FULL_SCALE[width]
+        peaks = bytearray(count)
+        position = 0
+        for bucket in range(count):
+            end = (bucket + 1) * frames // count
+            peak = 0
+            while position < end:
+                data = wav.readframes(min(end - position, CHUNK_FRAMES))
+                if not data:
+                    # Truncated file: the header promised more frames than there are
+                    end = position = frames
+                    break
+                position += len(data) // (width * channels)
+                peak = max(peak, _chunk_peak(data, width))
+            peaks[bucket] = min(255, peak * 255 // full_scale)
+
+    duration = frames / sample_rate if sample_rate else 0.0
+    return Peaks(duration, sample_rate, channels, bytes(peaks), stat.st_size, stat.st_mtime)
+
+
+def write_peaks(path: str, peaks: Peaks):
+    """Write peaks to the binary cache, replacing any previous file atomically"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, peaks.channels, len(peaks.peaks), peaks.sample_rate,
+                             peaks.duration, peaks.size, peaks.mtime))
+        f.write(peaks.peaks)
+    os.replace(tmp_path, path)
+
+
+def read_peaks(path: str) -> Optional[Peaks]:
+    """Read peaks from the binary cache, or None if the file is missing or not in this format"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, channels, count, sample_rate, duration, size, mtime = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            peaks = f.read(count)
+    except OSError:
+        return None
+    if len(peaks) != count:
+        return None
+    return Peaks(duration, sample_rate, channels, peaks, size, mtime)
+
+
+def build_peaks(source: str, cache_path: str, claim_path: str, count: int = PEAK_COUNT) -> Optional[Peaks]:
+    """Compute the peaks of one file and write them to the cache. Runs in the job process started by AudioPeaks."""
+    try:
+        peaks = compute_peaks(source, count)
+        write_peaks(cache_path, peaks)
+        return peaks
+    except (OSError, EOFError, wave.Error) as e:
+        print(f"Error computing waveform of {source}: {e}")
+        return None
+    finally:
+        try:
+            os.remove(claim_path)
+        except OSError:
+            pass
+
+
+class AudioPeaks:
+    """Waveform peaks and durations of the indexed audio files, computed in the background.
+
+    Each file is decoded once, by `python -m utils.audio_peaks` in a fresh
+    interpreter that imports nothing but this module (forking a process that
+    runs request threads could copy a lock one of them holds, and
+    multiprocessing's spawn would import the whole application again). Its
+    peaks are written to a small binary file in `cache_dir` next to the size
+    and mtime of the audio they came from. Requests only ever read that cache;
+    a file whose peaks aren't ready yet gets scheduled and reported as pending.
+    At most `workers` jobs run at a time per process. A claim file keeps the
+    prefork workers, which share the cache directory, from decoding the same
+    file more than once, and the threads waiting on the jobs are started lazily
+    in whichever process first needs them, so none is inherited across a fork.
+    """
+
+    def __init__(self, cache_dir: str, workers: int = 1, count: int = PEAK_COUNT):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.count = count
+        self.hits = 0
+        self.misses = 0
+        self._peaks: Dict[str, Peaks] = {}
+        self._pending: Dict[str, Future] = {}
+        # (size, mtime) of files that could not be decoded, so they aren't retried on every request
+        self._failed: Dict[str, Tuple[int, float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _cache_path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, f"{filename}.peaks")
+
+    def get(self, entry: AudioEntry) -> Optional[Peaks]:
+        """The peaks of an indexed file, or None (scheduling them) if they aren't computed yet"""
+        peaks = self._peaks.get(entry.filename)
+        if peaks is not None and peaks.is_current(entry):
+            self.hits += 1
+            return peaks
+
+        self.misses += 1
+        peaks = read_peaks(self._cache_path(entry.filename))
+        if peaks is not None and peaks.is_current(entry):
+            self._peaks[entry.filename] = peaks
+            return peaks
+
+        if not self.failed(entry):
+            self._submit(entry)
+        return None
+
+    def pending(self, filename: str) -> bool:
+        future = self._pending.get(filename)
+        return future is not None and not future.done()
+
+    def failed(self, entry: AudioEntry) -> bool:
+        """Whether this version of the file could not be decoded"""
+        return self._failed.get(entry.filename) == (entry.size, entry.mtime)
+
+    def schedule(self, entries: Mapping[str, AudioEntry]):
+        """Queue every file whose cached peaks are missing or stale, and forget removed files"""
+        for known in (self._peaks, self._failed):
+            for filename in list(known):
+                if filename not in entries:
+                    known.pop(filename, None)
+        try:
+            cached = os.listdir(self.cache_dir)
+        except OSError:
+            cached = []
+        for name in cached:
+            if name.endswith('.peaks') and name[:-len('.peaks')] not in entries:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+        for entry in entries.values():
+            self.get(entry)
+
+    def _submit(self, entry: AudioEntry):
+        with self._lock:
+            if self.pending(entry.filename):
+                return
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Error creating waveform cache {self.cache_dir}: {e}")
+                return
+            claim_path = self._cache_path(entry.filename) + '.pending'
+            if not self._claim(claim_path):
+                # Another process is already on it
+                return
+
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='audio-peaks')
+                self._executor_pid = os.getpid()
+                self._pending = {}
+            future = self._executor.submit(self._run_job, entry, claim_path)
+            self._pending[entry.filename] = future
+            future.add_done_callback(lambda future, entry=entry: self._done(entry, future))
+
+    def _run_job(self, entry: AudioEntry, claim_path: str) -> Optional[Peaks]:
+        cache_path = os.path.abspath(self._cache_path(entry.filename))
+        try:
+            subprocess.run([sys.executable, '-m', 'utils.audio_peaks', os.path.abspath(entry.path), cache_path,
+                            os.path.abspath(claim_path), str(self.count)], cwd=_ROOT)
+        except OSError as e:
+            print(f"Error starting the waveform job for {entry.filename}: {e}")
+            try:
+                os.remove(claim_path)
+            except OSError:
+                pass
+            return None
+        # The job prints its own errors; without a current cache file it failed
+        peaks = read_peaks(cache_path)
+        return peaks if peaks is not None and peaks.is_current(entry) else None
+
+    def _done(self, entry: AudioEntry, future: Future):
+        try:
+            peaks = future.result()
+        except Exception as e:
+            print(f"Waveform job for {entry.filename} failed: {e}")
+            peaks = None
+        if peaks is None:
+            self._failed[entry.filename] = (entry.size, entry.mtime)
+        else:
+            self._peaks[entry.filename] = peaks
+
+    @staticmethod
+    def _claim(claim_path: str) -> bool:
+        """Create the claim file, taking over claims abandoned by a dead process"""
+        for _ in range(2):
+            try:
+                os.close(os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(claim_path).st_mtime < STALE_CLAIM_SECONDS:
+                        return False
+                    os.remove(claim_path)
+                except OSError:
+                    pass
+            except OSError as e:
+                print(f"Error claiming {claim_path}: {e}")
+                return False
+        return False
+
+
+if __name__ == '__main__':
+    # Started by AudioPeaks: python -m utils.audio_peaks SOURCE CACHE_PATH CLAIM_PATH COUNT
+    source, cache_path, claim_path, count = sys.argv[1:]
+    sys.exit(0 if build_peaks(source, cache_path, claim_path, int(count)) is not None else 1)
@@ -0,0 +1,142 @@
+import os
+import zlib
+import struct
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+from flask import current_app, request
+from werkzeug.security import safe_join
+
+# Content codings we build, in order of preference when the client rates them equally
+ENCODINGS = ('gzip', 'deflate')
+
+# Bodies smaller than this gain less from compression than the header costs
+MIN_SIZE = 512
+
+# Static files worth compressing; images and audio are already compressed
+COMPRESSIBLE_EXTENSIONS = frozenset({'.css', '.js', '.json', '.svg', '.html', '.txt', '.xml', '.map'})
+
+Variants = Mapping[str, bytes]
+
+
+# zlib's default; level 9 is several times slower on large quizzes for a few percent
+COMPRESSION_LEVEL = 6
+
+# gzip header with mtime 0, so the bytes (and so the ETag) are stable across restarts
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+_ZLIB_HEADER = b'\x78\x9c'
+
+
+def compress(body: bytes) -> Variants:
+    """Build the identity, gzip and deflate representations of `body` once.
+
+    gzip and deflate (zlib) wrap the same raw deflate stream, so the body is
+    only compressed once. Compressed variants are only kept when they are
+    smaller than the original.
+    """
+    variants: Dict[str, bytes] = {'identity': body}
+    if len(body) >= MIN_SIZE:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        stream = compressor.compress(body) + compressor.flush()
+        gzip_data = b''.join((_GZIP_HEADER, stream, struct.pack('<II', zlib.crc32(body), len(body) & 0xffffffff)))
+        deflate_data = b''.join((_ZLIB_HEADER, stream, struct.pack('>I', zlib.adler32(body))))
+        for encoding, data in (('gzip', gzip_data), ('deflate', deflate_data)):
+            if len(data) < len(body):
+                variants[encoding] = data
+    return MappingProxyType(variants)
+
+
+def choose_encoding(variants: Variants) -> str:
+    """Pick the variant the current request's Accept-Encoding rates highest"""
+    accept = request.accept_encodings
+    best, best_quality = 'identity', 0.0
+    for encoding in ENCODINGS:
+        if encoding in variants:
+            quality = accept[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+    return best
+
+
+def send_variants(variants: Variants, mimetype: str, etag: str, conditional: bool = True, **kwargs):
+    """Build a response from precompressed variants.
+
+    Each encoding gets its own ETag, since the bytes differ, and Vary tells caches
+    the body depends on Accept-Encoding. No compression happens here.
+    """
+    encoding = choose_encoding(variants)
+    response = current_app.response_class(variants[encoding], mimetype=mimetype, **kwargs)
+    if len(variants) > 1:
+        response.vary.add('Accept-Encoding')
+    if encoding == 'identity':
+        response.set_etag(etag)
+    else:
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{etag}-{encoding}')
+    if conditional:
+        response.make_conditional(request)
+    return response
+
+
+class CompressedFile(NamedTuple):
+    variants: Variants
+    etag: str
+    mtime_ns: int
+
+
+class PrecompressedFiles:
+    """Compressed variants of the text files under a directory, kept in memory.
+
+    Every compressible file is compressed at startup, and again only when its
+    mtime changes, so serving a file never costs compression CPU.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[str, CompressedFile] = {}
+        self._lock = threading.Lock()
+
+    def preload(self) -> int:
+        """Compress every compressible file under the root. Returns the number of files."""
+        count = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                relative = os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, '/')
+                if self.get(relative) is not None:
+                    count += 1
+        return count
+
+    def get(self, filename: str) -> Optional[CompressedFile]:
+        """Get the variants of a file, or None if it is missing or not worth compressing"""
+        if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return None
+        path = safe_join(self.root, filename)
+        if path is None:
+            return None
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        entry = self._files.get(filename)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            return entry
+
+        with self._lock:
+            entry = self._files.get(filename)
+            if entry is None or entry.mtime_ns != mtime_ns:
+                try:
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                except OSError:
+                    return None
+                entry = CompressedFile(compress(body), hashlib.sha1(body).hexdigest(), mtime_ns)
+                self._files[filename] = entry
+        return entry
+
+    def sizes(self) -> Tuple[int, int]:
+        """Total identity and gzip bytes held, for logging"""
+        files = list(self._files.values())
+        return (sum(len(f.variants['identity']) for f in files),
+                sum(len(f.variants.get('gzip', f.variants['identity'])) for f in files))
@@ -0,0 +1,631 @@
+import json
+import math
+import threading
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+# Upper bound on the number of points a single request may evaluate
+MAX_POINTS = 10001
+
+# Standard deviations around the mean beyond which hypergeometric PMFs aren't summed;
+# the mass further out is far below double precision
+TAIL_SDS = 10
+
+# Upper bound on the number of PMF terms summed to get a hypergeometric CDF
+MAX_SUMMED_TERMS = 2000000
+
+# Total size of the encoded results kept by evaluate(); a 10001-point result is about half a megabyte
+CACHE_BYTES = 16 * 1024 * 1024
+
+# Below this, PMF values are carried as logarithms instead of multiplied
+_TINY = 1e-250
+
+# From these arguments on, incomplete gamma/beta functions are integrated by quadrature
+# instead of expanded as a series or continued fraction, whose length grows with them
+_GAMMA_QUADRATURE = 100
+_BETA_QUADRATURE = 3000
+
+_EPSILON = 1e-15
+_FPMIN = 1e-300
+_MAX_ITERATIONS = 10000
+_LOG_SQRT_2PI = 0.5 * math.log(2 * math.pi)
+
+
+class DistributionError(ValueError):
+    """Raised for unknown distributions or invalid parameters"""
+
+
+class Distribution(NamedTuple):
+    discrete: bool
+    params: Tuple[str, ...]
+    validate: Callable[..., Optional[str]]
+    support: Callable[..., Tuple[float, float]]
+    moments: Callable[..., Tuple[float, float]]
+
+
+def _probability(p: float) -> Optional[str]:
+    return None if 0 <= p <= 1 else 'p must be between 0 and 1'
+
+
+DISTRIBUTIONS: Dict[str, Distribution] = {
+    'binomial': Distribution(
+        True, ('n', 'p'),
+        lambda n, p: _probability(p) or (None if n >= 0 and n == int(n) else 'n must be a non-negative integer'),
+        lambda n, p: (0, n),
+        lambda n, p: (n * p, n * p * (1 - p))
+    ),
+    'poisson': Distribution(
+        True, ('lambda',),
+        lambda lam: None if lam >= 0 else 'lambda must not be negative',
+        lambda lam: (0, math.inf),
+        lambda lam: (lam, lam)
+    ),
+    'geometric': Distribution(
+        # Number of trials up to and including the first success
+        True, ('p',),
+        lambda p: None if 0 < p <= 1 else 'p must be in (0, 1]',
+        lambda p: (1, math.inf),
+        # p * p underflows to zero long before p does
+        lambda p: (1 / p, (1 - p) / p / p)
+    ),
+    'hypergeometric': Distribution(
+        # Successes in n draws without replacement from N items, K of which are successes
+        True, ('N', 'K', 'n'),
+        lambda N, K, n: None if all(v == int(v) for v in (N, K, n)) and 0 <= K <= N and 0 <= n <= N
+        else 'need integers with 0 <= K <= N and 0 <= n <= N',
+        lambda N, K, n: (max(0, n + K - N), min(n, K)),
+        lambda N, K, n: (0.0, 0.0) if N == 0 else
+        (n * K / N, n * K / N * (N - K) / N * (N - n) / (N - 1) if N > 1 else 0.0)
+    ),
+    'normal': Distribution(
+        False, ('mean', 'std'),
+        lambda mean, std: None if std > 0 else 'std must be positive',
+        lambda mean, std: (-math.inf, math.inf),
+        lambda mean, std: (mean, std * std)
+    ),
+    'exponential': Distribution(
+        False, ('rate',),
+        lambda rate: None if rate > 0 else 'rate must be positive',
+        lambda rate: (0, math.inf),
+        lambda rate: (1 / rate, 1 / rate / rate)
+    ),
+    'uniform': Distribution(
+        False, ('a', 'b'),
+        lambda a, b: None if a < b else 'a must be less than b',
+        lambda a, b: (a, b),
+        lambda a, b: ((a + b) / 2, (b - a) ** 2 / 12)
+    ),
+}
+
+
+class ResultCache:
+    """LRU cache of encoded results, bounded by their total size rather than their number.
+
+    Results range from a few hundred bytes to half a megabyte, so a bound on the
+    entry count alone would let a client that varies the parameters pin hundreds
+    of megabytes in every worker.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self.size = 0
+
+
+result_cache = ResultCache(CACHE_BYTES)
+
+
+def _gauss_legendre(count: int) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """Nodes and weights of `count`-point Gauss-Legendre quadrature on [0, 1]"""
+    nodes, weights = [], []
+    for i in range(1, count + 1):
+        z = math.cos(math.pi * (i - 0.25) / (count + 0.5))
+        for _ in range(100):
+            # Legendre polynomial of degree `count` at z, and its derivative
+            p, previous = 1.0, 0.0
+            for j in range(1, count + 1):
+                p, previous = ((2 * j - 1) * z * p - (j - 1) * previous) / j, p
+            derivative = count * (z * p - previous) / (z * z - 1)
+            step = p / derivative
+            z -= step
+            if abs(step) < 1e-16:
+                break
+        nodes.append((1 - z) / 2)
+        weights.append(1 / ((1 - z * z) * derivative * derivative))
+    return tuple(nodes), tuple(weights)
+
+
+_NODES, _WEIGHTS = _gauss_legendre(48)
+
+
+def _stirling_error(n: float) -> float:
+    """log(n!) - log(sqrt(2 pi n) (n / e)^n), the error of Stirling's formula, for n > 0"""
+    if n <= 15:
+        return math.lgamma(n + 1) - (n + 0.5) * math.log(n) + n - _LOG_SQRT_2PI
+    n2 = n * n
+    if n > 500:
+        return (1 / 12 - 1 / 360 / n2) / n
+    if n > 80:
+        return (1 / 12 - (1 / 360 - 1 / 1260 / n2) / n2) / n
+    if n > 35:
+        return (1 / 12 - (1 / 360 - (1 / 1260 - 1 / 1680 / n2) / n2) / n2) / n
+    return (1 / 12 - (1 / 360 - (1 / 1260 - (1 / 1680 - 1 / 1188 / n2) / n2) / n2) / n2) / n
+
+
+def _deviance(x: float, m: float) -> float:
+    """x log(x / m) + m - x, without the cancellation of evaluating it directly when x is close to m"""
+    if abs(x - m) < 0.1 * (x + m):
+        v = (x - m) / (x + m)
+        total = (x - m) * v
+        term = 2 * x * v
+        v2 = v * v
+        for j in range(1, 1000):
+            term *= v2
+            updated = total + term / (2 * j + 1)
+            if updated == total:
+                return updated
+            total = updated
+    return x * math.log(x / m) + m - x
+
+
+def _log_poisson(k: float, lam: float) -> float:
+    """log P(X = k) for X ~ Poisson(lam).
+
+    Loader's saddle point form: log-gamma of a large k is a huge number minus
+    another, which would leave only a few correct digits for lambda in the billions.
+    """
+    if lam == 0:
+        return 0.0 if k == 0 else -math.inf
+    if k == 0:
+        return -lam
+    return -_stirling_error(k) - _deviance(k, lam) - _LOG_SQRT_2PI - 0.5 * math.log(k)
+
+
+def _log_binomial(k: float, n: float, p: float, q: float) -> float:
+    """log P(X = k) for X ~ Binomial(n, p), in Loader's saddle point form; `q` is 1 - p"""
+    if p == 0:
+        return 0.0 if k == 0 else -math.inf
+    if q == 0:
+        return 0.0 if k == n else -math.inf
+    if k == 0:
+        return n * (math.log1p(-p) if p < 0.5 else math.log(q))
+    if k == n:
+        return n * (math.log(p) if p < 0.5 else math.log1p(-q))
+    return (_stirling_error(n) - _stirling_error(k) - _stirling_error(n - k)
+            - _deviance(k, n * p) - _deviance(n - k, n * q)
+            - _LOG_SQRT_2PI - 0.5 * (math.log(k) + math.log1p(-k / n)))
+
+
+def _log_pmf(name: str, params: Tuple[float, ...], k: int) -> float:
+    """Log-probability of a single point, accurate even when the parameters are in the billions"""
+    if name == 'binomial':
+        n, p = params
+        return _log_binomial(k, n, p, 1 - p)
+    if name == 'poisson':
+        lam, = params
+        return _log_poisson(k, lam)
+    if name == 'geometric':
+        p, = params
+        if p == 1:
+            return 0.0 if k == 1 else -math.inf
+        return (k - 1) * math.log1p(-p) + math.log(p)
+    if name == 'hypergeometric':
+        N, K, n = params
+        if n == 0 or n == N:
+            return 0.0 if k == (K if n == N else 0) else -math.inf
+        # A ratio of binomial probabilities, all taken with p = n / N so each stays accurate
+        p, q = n / N, (N - n) / N
+        return _log_binomial(k, K, p, q) + _log_binomial(n - k, N - K, p, q) - _log_binomial(n, N, p, q)
+    raise DistributionError(f"Unknown discrete distribution: {name}")
+
+
+def _pmf_ratio(name: str, params: Tuple[float, ...], k: int) -> float:
+    """P(k + 1) / P(k), so a whole range needs only one log-probability evaluation"""
+    if name == 'binomial':
+        n, p = params
+        return (n - k) / (k + 1) * p / (1 - p)
+    if name == 'poisson':
+        lam, = params
+        return lam / (k + 1)
+    if name == 'geometric':
+        p, = params
+        return 1 - p
+    N, K, n = params
+    return (K - k) * (n - k) / ((k + 1) * (N - K - n + k + 1))
+
+
+def _discrete_series(name: str, params: Tuple[float, ...], first: int, last: int) -> List[float]:
+    """PMF for every integer in [first, last] inside the support, in one pass"""
+    if (name == 'binomial' and params[1] in (0, 1) or name == 'geometric' and params[0] == 1
+            or name == 'poisson' and params[0] == 0):
+        return [math.exp(_log_pmf(name, params, k)) for k in range(first, last + 1)]
+
+    values = []
+    log_p = _log_pmf(name, params, first)
+    p = math.exp(log_p)
+    for k in range(first, last + 1):
+        values.append(p)
+        if k == last:
+            break
+        ratio = _pmf_ratio(name, params, k)
+        if p > _TINY:
+            p *= ratio
+        else:
+            # Products of subnormal floats lose precision, so walk the far tail in log space
+            log_p = log_p + math.log(ratio) if ratio > 0 else -math.inf
+            p = math.exp(log_p)
+            if p > _TINY:
+                log_p = math.log(p)
+        if p <= _TINY and values[-1] > _TINY:
+            log_p = _log_pmf(name, params, k + 1)
+    return values
+
+
+def _nonzero(value: float) -> float:
+    return value if abs(value) >= _FPMIN else _FPMIN
+
+
+def _gamma_upper(a: float, x: float) -> float:
+    """Regularized upper incomplete gamma function Q(a, x)"""
+    if x <= 0:
+        return 1.0
+    if a >= _GAMMA_QUADRATURE:
+        return _gamma_quadrature(a, x)
+
+    # x^a e^-x / Gamma(a), written as a Poisson probability
+    prefactor = a * math.exp(_log_poisson(a, x))
+    if x < a + 1:
+        # Series for the lower function P(a, x)
+        term = total = 1 / a
+        for i in range(1, _MAX_ITERATIONS):
+            term *= x / (a + i)
+            total += term
+            if abs(term) < abs(total) * _EPSILON:
+                return 1 - prefactor * total
+        raise ArithmeticError('incomplete gamma series did not converge')
+
+    # Continued fraction for Q(a, x), by the modified Lentz method
+    b = x + 1 - a
+    c = 1 / _FPMIN
+    d = h = 1 / b
+    for i in range(1, _MAX_ITERATIONS):
+        an = -i * (i - a)
+        b += 2
+        d = 1 / _nonzero(an * d + b)
+        c = _nonzero(b + an / c)
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < _EPSILON:
+            return prefactor * h
+    raise ArithmeticError('incomplete gamma continued fraction did not converge')
+
+
+def _gamma_quadrature(a: float, x: float) -> float:
+    """Q(a, x) for large a: integrate t^(a-1) e^-t / Gamma(a), a Poisson PMF in t, from x into the near tail"""
+    a1 = a - 1
+    sd = math.sqrt(a1)
+    if x > a1:
+        upper = max(a1 + 11.5 * sd, x + 6 * sd)
+    else:
+        upper = max(0.0, min(a1 - 7.5 * sd, x - 5 * sd))
+    span = upper - x
+    integral = span * math.fsum(weight * math.exp(_log_poisson(a1, x + span * node))
+                                for node, weight in zip(_NODES, _WEIGHTS))
+    # Above the mode the integral is Q itself; below it, it is minus P
+    return integral if x > a1 else 1 + integral
+
+
+def _beta_inc(a: float, b: float, x: float, y: float) -> float:
+    """Regularized incomplete beta function I_x(a, b); `y` is 1 - x, passed separately to keep its precision"""
+    if x <= 0:
+        return 0.0
+    if y <= 0:
+        return 1.0
+    if a >= _BETA_QUADRATURE and b >= _BETA_QUADRATURE:
+        return _beta_quadrature(a, b, x, y)
+    # x^a y^b / (a B(a, b)) is a binomial probability times b / (a + b); the fraction converges
+    # quickly below the mean, so the upper side is computed from the symmetric lower one
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(_log_binomial(a, a + b, x, y)) * b / (a + b) * _beta_fraction(a, b, x)
+    return 1 - math.exp(_log_binomial(b, a + b, y, x)) * a / (a + b) * _beta_fraction(b, a, y)
+
+
+def _beta_fraction(a: float, b: float, x: float) -> float:
+    """Continued fraction of the incomplete beta function, by the modified Lentz method"""
+    c = 1.0
+    d = h = 1 / _nonzero(1 - (a + b) * x / (a + 1))
+    for m in range(1, _MAX_ITERATIONS):
+        # Even step
+        numerator = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        d = 1 / _nonzero(1 + numerator * d)
+        c = _nonzero(1 + numerator / c)
+        h *= d * c
+        # Odd step
+        numerator = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1 / _nonzero(1 + numerator * d)
+        c = _nonzero(1 + numerator / c)
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < _EPSILON:
+            return h
+    raise ArithmeticError('incomplete beta continued fraction did not converge')
+
+
+def _beta_quadrature(a: float, b: float, x: float, y: float) -> float:
+    """I_x(a, b) for large a and b: integrate t^(a-1) (1-t)^(b-1) / B(a, b), a binomial PMF in t, from x into the near tail"""
+    mean = a / (a + b)
+    sd = math.sqrt(a * b / ((a + b) * (a + b) * (a + b + 1)))
+    # Step away from x rather than towards an endpoint, so 1 - t keeps the precision of y
+    if x > mean:
+        span = min(y, max(mean + 10 * sd - x, 5 * sd))
+    else:
+        span = -min(x, max(x - mean + 10 * sd, 5 * sd))
+    integral = span * (a + b - 1) * math.fsum(
+        weight * math.exp(_log_binomial(a - 1, a + b - 2, x + span * node, y - span * node))
+        for node, weight in zip(_NODES, _WEIGHTS)
+    )
+    return 1 - integral if x > mean else -integral
+
+
+def _summed_range(params: Tuple[float, ...]) -> Tuple[int, int]:
+    """The part of a hypergeometric support that carries any mass in double precision"""
+    dist = DISTRIBUTIONS['hypergeometric']
+    low, high = dist.support(*params)
+    mean, variance = dist.moments(*params)
+    sd = math.sqrt(variance)
+    first = int(max(low, math.floor(mean - TAIL_SDS * sd)))
+    last = int(min(high, math.ceil(mean + TAIL_SDS * sd)))
+    if last - first + 1 > MAX_SUMMED_TERMS:
+        raise DistributionError('range is too wide to sum exactly')
+    return first, last
+
+
+def _discrete_cdf(name: str, params: Tuple[float, ...], k: int) -> float:
+    """P(X <= k)"""
+    low, high = DISTRIBUTIONS[name].support(*params)
+    if k < low:
+        return 0.0
+    if k >= high:
+        return 1.0
+    if name == 'binomial':
+        n, p = params
+        return _beta_inc(n - k, k + 1, 1 - p, p)
+    if name == 'poisson':
+        lam, = params
+        return _gamma_upper(k + 1, lam)
+    if name == 'geometric':
+        p, = params
+        return 1.0 if p == 1 else -math.expm1(k * math.log1p(-p))
+
+    # The hypergeometric CDF has no closed form: sum the PMF on the lighter side of k
+    first, last = _summed_range(params)
+    if k < DISTRIBUTIONS[name].moments(*params)[0]:
+        return math.fsum(_discrete_series(name, params, first, k)) if k >= first else 0.0
+    return 1 - math.fsum(_discrete_series(name, params, k + 1, last)) if k < last else 1.0
+
+
+def _discrete_quantiles(name: str, params: Tuple[float, ...], quantiles: Tuple[float, ...]) -> Dict[float, float]:
+    """Smallest k with P(X <= k) >= q, for each q"""
+    dist = DISTRIBUTIONS[name]
+    low, high = dist.support(*params)
+    found: Dict[float, float] = {}
+    if name == 'hypergeometric' and quantiles:
+        # Every CDF evaluation is a sum, so walk the support once instead of bisecting
+        first, last = _summed_range(params)
+        targets = sorted(quantiles)
+        total = 0.0
+        for offset, p in enumerate(_discrete_series(name, params, first, last)):
+            total += p
+            while targets and total >= targets[0] - 1e-12:
+                found[targets.pop(0)] = first + offset
+        return found
+
+    mean, variance = dist.moments(*params)
+    for q in quantiles:
+        target = q - 1e-12
+        if target <= 0:
+            found[q] = low
+        elif name == 'geometric':
+            p, = params
+            found[q] = low if p == 1 else max(low, math.ceil(math.log1p(-target) / math.log1p(-p)))
+        else:
+            # Bracket the quantile with steps that double from one standard deviation, then bisect
+            below = int(low) - 1
+            above = int(min(high, max(low, math.ceil(mean))))
+            step = max(1, math.ceil(math.sqrt(variance)))
+            while _discrete_cdf(name, params, above) < target:
+                below, above = above, int(min(high, above + step))
+                step *= 2
+            while above - below > 1:
+                middle = (below + above) // 2
+                if _discrete_cdf(name, params, middle) < target:
+                    below = middle
+                else:
+                    above = middle
+            found[q] = above
+    return found
+
+
+def _continuous_pdf_cdf(name: str, params: Tuple[float, ...], x: float) -> Tuple[float, float]:
+    if name == 'normal':
+        dist = NormalDist(*params)
+        return dist.pdf(x), dist.cdf(x)
+    if name == 'exponential':
+        rate, = params
+        if x < 0:
+            return 0.0, 0.0
+        return rate * math.exp(-rate * x), -math.expm1(-rate * x)
+    a, b = params
+    if x < a:
+        return 0.0, 0.0
+    if x > b:
+        return 0.0, 1.0
+    return 1 / (b - a), (x - a) / (b - a)
+
+
+def _continuous_quantile(name: str, params: Tuple[float, ...], q: float) -> float:
+    if name == 'normal':
+        if q in (0, 1):
+            return -math.inf if q == 0 else math.inf
+        return NormalDist(*params).inv_cdf(q)
+    if name == 'exponential':
+        rate, = params
+        return math.inf if q == 1 else -math.log1p(-q) / rate
+    a, b = params
+    return a + q * (b - a)
+
+
+def _default_range(dist: Distribution, params: Tuple[float, ...]) -> Tuple[float, float]:
+    """Mean ± 4 standard deviations, clipped to the support (the range the chart used to draw).
+
+    Discrete ranges are narrowed to the MAX_POINTS integers around the mean, so
+    wide distributions (binomial with n in the millions) still get a default.
+    """
+    low, high = dist.support(*params)
+    if dist.discrete and high - low <= 1000:
+        # Small finite supports are drawn whole
+        return low, high
+
+    mean, variance = dist.moments(*params)
+    sd = math.sqrt(variance)
+    start = max(low, mean - 4 * sd)
+    stop = min(high, mean + 4 * sd)
+    if not dist.discrete:
+        return start, stop
+    # Rounding outwards below adds up to two points
+    if stop - start + 1 > MAX_POINTS - 2:
+        start = max(low, round(mean) - MAX_POINTS // 2)
+        stop = min(high, start + MAX_POINTS - 1)
+        start = max(low, stop - MAX_POINTS + 1)
+    return math.floor(start), math.ceil(stop)
+
+
+def evaluate(name: str, params: Tuple[float, ...], start: Optional[float] = None, stop: Optional[float] = None,
+             points: int = 81, quantiles: Tuple[float, ...] = ()) -> bytes:
+    """Compute PMF/PDF, CDF and quantiles of a distribution over a whole range in one call.
+
+    Results are returned as encoded JSON and cached, up to CACHE_BYTES in total,
+    so repeated parameter sets (the calculator's defaults, shared homework values)
+    cost a dictionary lookup.
+
+    Raises:
+        DistributionError: If the distribution is unknown or the parameters are invalid
+    """
+    key = (name, params, start, stop, points, quantiles)
+    body = result_cache.get(key)
+    if body is None:
+        try:
+            body = _evaluate(name, params, start, stop, points, quantiles)
+        except DistributionError:
+            raise
+        except (ArithmeticError, ValueError) as e:
+            # Valid parameters can still be too extreme for floats (p = 1e-300, n = 1e300)
+            raise DistributionError(f"parameters out of range: {e}") from e
+        result_cache.put(key, body)
+    return body
+
+
+def _evaluate(name: str, params: Tuple[float, ...], start: Optional[float], stop: Optional[float],
+              points: int, quantiles: Tuple[float, ...]) -> bytes:
+    dist = DISTRIBUTIONS.get(name)
+    if dist is None:
+        raise DistributionError(f"Unknown distribution: {name}")
+    if len(params) != len(dist.params):
+        raise DistributionError(f"{name} takes parameters {', '.join(dist.params)}")
+    if not all(math.isfinite(value) for value in params):
+        raise DistributionError('parameters must be finite numbers')
+    error = dist.validate(*params)
+    if error:
+        raise DistributionError(error)
+    if any(bound is not None and not math.isfinite(bound) for bound in (start, stop)):
+        raise DistributionError('start and stop must be finite numbers')
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise DistributionError('quantiles must be between 0 and 1')
+
+    default_start, default_stop = _default_range(dist, params)
+    start = default_start if start is None else start
+    stop = default_stop if stop is None else stop
+    if stop < start:
+        raise DistributionError('stop must not be less than start')
+
+    low, high = dist.support(*params)
+    mean, variance = dist.moments(*params)
+    result = {
+        'distribution': name,
+        'params': dict(zip(dist.params, params)),
+        'discrete': dist.discrete,
+        'mean': mean,
+        'variance': variance
+    }
+
+    if dist.discrete:
+        start, stop = math.ceil(start), math.floor(stop)
+        if stop - start + 1 > MAX_POINTS:
+            raise DistributionError(f"At most {MAX_POINTS} points per request")
+
+        # Only the part of the range inside the support has any mass; the CDF starts from its
+        # closed form just below it, so the cost depends on the range, not on how far it is from zero
+        first, last = int(max(start, low)), int(min(stop, high))
+        pmf = _discrete_series(name, params, first, last) if last >= first else []
+        total = _discrete_cdf(name, params, first - 1) if pmf else 0.0
+        cdf = []
+        for p in pmf:
+            total = min(1.0, total + p)
+            cdf.append(total)
+        below = max(0, min(stop, first - 1) - start + 1)
+        above = max(0, stop - max(start, last + 1) + 1)
+        result.update(
+            x=list(range(start, stop + 1)),
+            pmf=[0.0] * below + pmf + [0.0] * above,
+            cdf=[0.0] * below + cdf + [1.0] * above
+        )
+        found = _discrete_quantiles(name, params, quantiles)
+        result['quantiles'] = {str(q): found.get(q, high) for q in quantiles}
+    else:
+        points = max(2, min(int(points), MAX_POINTS))
+        step = (stop - start) / (points - 1)
+        xs = [start + i * step for i in range(points)]
+        pairs = [_continuous_pdf_cdf(name, params, x) for x in xs]
+        result.update(x=xs, pdf=[pdf for pdf, _ in pairs], cdf=[cdf for _, cdf in pairs])
+        result['quantiles'] = {str(q): _continuous_quantile(name, params, q) for q in quantiles}
+
+    # JSON has no infinity; report unbounded quantiles and moments as null
+    for q, value in result['quantiles'].items():
+        if isinstance(value, float) and math.isinf(value):
+            result['quantiles'][q] = None
+    for moment in ('mean', 'variance'):
+        if math.isinf(result[moment]):
+            result[moment] = None
+    return json.dumps(result, separators=(',', ':'), allow_nan=False).encode('utf-8')
@@ -0,0 +1,70 @@
+from typing import Callable, Collection, Dict, Optional, Type
+from werkzeug.datastructures import LanguageAccept
+from werkzeug.routing import BaseConverter, ValidationError
+
+# Shape of a locale URL segment (pt_PT, en_US). Subject ids are lowercase, so they never match it.
+LOCALE_PATTERN = r'[a-z]{2}_[A-Z]{2}'
+
+
+def locale_converter(available_locales: Callable[[], Collection[str]]) -> Type[BaseConverter]:
+    """Build a URL converter for the /<locale:locale>/ prefix.
+
+    Only locale-shaped segments are routed to it, and those naming a locale
+    without a translation file fail validation, so they 404 instead of
+    rendering the default locale under someone else's URL.
+    """
+
+    class LocaleConverter(BaseConverter):
+        regex = LOCALE_PATTERN
+        # Lower than the default string converter, so /pt_PT/x is tried as a locale first
+        weight = 50
+
+        def to_python(self, value: str) -> str:
+            if value not in available_locales():
+                raise ValidationError()
+            return value
+
+    return LocaleConverter
+
+
+def locale_from_path(path: str, available: Collection[str]) -> Optional[str]:
+    """The locale prefix of a URL path, or None if it doesn't start with one"""
+    prefix = path.split('/', 2)[1] if path.startswith('/') else ''
+    return prefix if prefix in available else None
+
+
+def localized_path(path: str, locale: str, available: Collection[str]) -> str:
+    """The same page under another locale: swap the locale prefix, or add one.
+
+    The result always starts with /<locale>, so it is safe to redirect to
+    whatever path the client sent.
+    """
+    parts = path.split('/')
+    if len(parts) > 1 and parts[1] in available:
+        parts[1] = locale
+        return '/'.join(parts)
+    return f"/{locale}/{path.lstrip('/')}"
+
+
+def negotiate_locale(accept_languages: LanguageAccept, available: Collection[str], default: str) -> str:
+    """The available locale the Accept-Language header rates highest.
+
+    A language tag without an exact match falls back to a locale of the same
+    language (en-GB to en_US, pt-BR to pt_PT) before the default is used.
+    """
+    by_tag = {locale.lower().replace('_', '-'): locale for locale in available}
+    by_language: Dict[str, str] = {}
+    for locale in sorted(available):
+        by_language.setdefault(locale.split('_')[0].lower(), locale)
+
+    # Accept headers iterate from the highest quality down
+    for value, quality in accept_languages:
+        if quality <= 0:
+            continue
+        tag = value.lower().replace('_', '-')
+        if tag == '*':
+            return default
+        locale = by_tag.get(tag) or by_language.get(tag.split('-')[0])
+        if locale is not None:
+            return locale
+    return default
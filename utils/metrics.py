@@ -0,0 +1,188 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Iterator, List, Tuple
+from flask import g, has_request_context, request, before_render_template, template_rendered
+
+# Latency buckets in seconds, from cached responses up to cold renders of huge quizzes
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+METRIC_HELP = {
+    'aesi_requests_total': ('counter', 'Requests handled, by endpoint and status'),
+    'aesi_request_duration_seconds': ('histogram', 'Time spent handling a request, by endpoint'),
+    'aesi_request_phase_seconds': ('histogram', 'Time spent per request in a phase (render, translations, quiz)'),
+    'aesi_cache_hits_total': ('counter', 'Cache lookups answered from memory'),
+    'aesi_cache_misses_total': ('counter', 'Cache lookups that had to load or render'),
+    'aesi_quiz_attempts_total': ('counter', 'Quiz answers received, by outcome (queued, dropped, rejected)'),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Per-endpoint latency histograms, per-phase timings and cache counters.
+
+    Every response gets a Server-Timing header with the time spent rendering
+    templates, looking up translations and loading quizzes, and everything is
+    exported in the Prometheus text format by `render()`. Recording a request
+    costs a few dictionary updates, so it can stay on in production. Every
+    series carries a `worker` label with the process id, because each prefork
+    worker keeps its own counters and a scrape reaches only one of them.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._caches: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._start_render, app)
+        template_rendered.connect(self._finish_render, app)
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_cache(self, name: str, cache: Any):
+        """Export the `hits` and `misses` attributes of `cache` under cache="name"."""
+        self._caches[name] = cache
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to the current request's `name` phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_phase(name, time.perf_counter() - start)
+
+    def instrument(self, obj: Any, method: str, phase: str):
+        """Time every call to `obj.method` as part of `phase`."""
+        original = getattr(obj, method)
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._add_phase(phase, time.perf_counter() - start)
+
+        setattr(obj, method, timed)
+
+    def _add_phase(self, name: str, seconds: float):
+        if has_request_context():
+            phases = g.setdefault('_metrics_phases', {})
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+
+    def _finish_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        endpoint = request.endpoint or 'not_found'
+        phases: Dict[str, float] = g.pop('_metrics_phases', {})
+
+        self.observe('aesi_request_duration_seconds', total, endpoint=endpoint)
+        self.inc('aesi_requests_total', endpoint=endpoint, status=str(response.status_code))
+        for name, seconds in phases.items():
+            self.observe('aesi_request_phase_seconds', seconds, endpoint=endpoint, phase=name)
+
+        timings = [f'{name};dur={seconds * 1000:.2f}' for name, seconds in phases.items()]
+        timings.append(f'total;dur={total * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def _start_render(self, sender, template, context, **extra):
+        g.setdefault('_metrics_renders', []).append(time.perf_counter())
+
+    def _finish_render(self, sender, template, context, **extra):
+        renders: List[float] = g.get('_metrics_renders')
+        if renders:
+            self._add_phase('render', time.perf_counter() - renders.pop())
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+        for name, cache in self._caches.items():
+            counters[('aesi_cache_hits_total', (('cache', name),))] = cache.hits
+            counters[('aesi_cache_misses_total', (('cache', name),))] = cache.misses
+        worker = (('worker', str(os.getpid())),)
+        counters = {(name, tuple(sorted(labels + worker))): value for (name, labels), value in counters.items()}
+        histograms = {(name, tuple(sorted(labels + worker))): value for (name, labels), value in histograms.items()}
+
+        lines: List[str] = []
+        for metric, (kind, description) in METRIC_HELP.items():
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {kind}')
+            if kind == 'counter':
+                for (name, labels), value in sorted(counters.items()):
+                    if name == metric:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+
+            for (name, labels), (counts, total, count) in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", f"{bound:g}"),))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {total:.6f}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value: float) -> str:
+    """Exact text of a counter; rounding would make rate() stall and then jump"""
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
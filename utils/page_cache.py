@@ -0,0 +1,123 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, List, NamedTuple, Optional, Tuple
+from flask import make_response, request
+from utils.compression import Variants, compress, send_variants
+
+# Only successful renders are cached; error pages are cached under their own fixed key
+CACHEABLE_STATUS = (200,)
+
+
+class CachedPage(NamedTuple):
+    variants: Variants
+    status: int
+    headers: Tuple[Tuple[str, str], ...]
+    etag: str
+    mimetype: str
+
+
+class PageCache:
+    """Caches fully rendered pages keyed by (endpoint, view args, locale).
+
+    Pages are a pure function of the route and the locale, so the rendered bytes
+    can be reused until translations or templates change. Nothing the client
+    sends besides the URL goes into the key, so requests can't multiply the
+    entries; past `max_entries` the least recently used page is evicted.
+    Templates and any other registered dependencies are checked at most every
+    `check_interval` seconds.
+    """
+
+    def __init__(self, template_folder: str, locale_func: Callable[[], str],
+                 check_interval: float = 2.0, max_entries: int = 512):
+        self.template_folder = template_folder
+        self.locale_func = locale_func
+        self.check_interval = check_interval
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pages: 'OrderedDict[Hashable, CachedPage]' = OrderedDict()
+        self._dependencies: List[Callable[[], Any]] = [self._template_signature]
+        self._signature: Optional[Tuple[Any, ...]] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def depends_on(self, version_func: Callable[[], Any]):
+        """Invalidate the cache whenever `version_func` returns a different value."""
+        self._dependencies.append(version_func)
+
+    def invalidate(self):
+        """Drop every cached page."""
+        self._pages = OrderedDict()
+
+    def _template_signature(self) -> Tuple[int, int]:
+        count, latest = 0, 0
+        for root, _, files in os.walk(self.template_folder):
+            for filename in files:
+                count += 1
+                latest = max(latest, os.stat(os.path.join(root, filename)).st_mtime_ns)
+        return count, latest
+
+    def _check_dependencies(self):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            signature = tuple(dependency() for dependency in self._dependencies)
+            if signature != self._signature:
+                self._signature = signature
+                self.invalidate()
+
+    def respond(self, key: Hashable, render: Callable[[], Any],
+                cacheable_status: Tuple[int, ...] = CACHEABLE_STATUS):
+        """Serve the cached page for `key`, rendering and storing it on a miss."""
+        self._check_dependencies()
+
+        pages = self._pages
+        page = pages.get(key)
+        if page is None:
+            self.misses += 1
+            response = make_response(render())
+            if response.status_code not in cacheable_status:
+                return response
+
+            body = response.get_data()
+            headers = tuple(
+                (name, value) for name, value in response.headers.items()
+                if name not in ('Content-Length', 'Content-Type', 'Set-Cookie')
+            )
+            page = CachedPage(compress(body), response.status_code, headers,
+                              hashlib.sha1(body).hexdigest(), response.mimetype)
+            pages[key] = page
+            while len(pages) > self.max_entries:
+                try:
+                    pages.popitem(last=False)
+                except KeyError:
+                    break
+        else:
+            self.hits += 1
+            try:
+                pages.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread in the meantime
+                pass
+
+        return send_variants(page.variants, page.mimetype, page.etag, conditional=page.status == 200,
+                             status=page.status, headers=list(page.headers))
+
+    def cached(self, view: Callable) -> Callable:
+        """Decorator caching a view by endpoint, view args and locale."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Query strings end up in the page (og:url), so only plain URLs are shared
+            if request.query_string:
+                return view(*args, **kwargs)
+            key = (request.endpoint, tuple(sorted(kwargs.items())), self.locale_func())
+            return self.respond(key, lambda: view(*args, **kwargs))
+        return wrapper
@@ -0,0 +1,247 @@
+import gc
+import os
+import sys
+import time
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from werkzeug.wsgi import FileWrapper, _RangeWrapper
+
+# Seconds an idle keep-alive connection may hold a worker thread
+KEEPALIVE_TIMEOUT = 5
+
+# Seconds to wait for a free thread before checking for shutdown again
+_FREE_THREAD_POLL = 0.5
+
+
+class _SendfileWrapper(FileWrapper):
+    """The server's wsgi.file_wrapper: marks file bodies that _send_files may hand to sendfile()"""
+
+
+class _SendfileBody:
+    """Response body that writes part of a file straight from the page cache to the socket"""
+
+    def __init__(self, wrapper: _SendfileWrapper, sock: socket.socket, offset: int, count: Optional[int]):
+        self.wrapper = wrapper
+        self.sock = sock
+        self.offset = offset
+        self.count = count
+
+    def __iter__(self):
+        # The server sends the status line and headers on the first write, even an empty one
+        yield b''
+        self.sock.sendfile(self.wrapper.file, self.offset, self.count)
+
+    def close(self):
+        self.wrapper.close()
+
+
+def _send_files(app):
+    """Serve the bodies built with our wsgi.file_wrapper, whole or a Range of them, with sendfile()"""
+    def send_files_app(environ, start_response):
+        body = app(environ, start_response)
+        sock = environ.get('werkzeug.socket')
+        if isinstance(body, _SendfileWrapper) and sock is not None:
+            return _SendfileBody(body, sock, body.file.tell(), None)
+        # send_file answers a Range with its own wrapper around ours
+        if isinstance(body, _RangeWrapper) and isinstance(body.iterable, _SendfileWrapper) and sock is not None:
+            return _SendfileBody(body.iterable, sock, body.start_byte, body.byte_range)
+        return body
+    return send_files_app
+
+
+class _RequestHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+
+    def make_environ(self):
+        environ = super().make_environ()
+        environ['wsgi.file_wrapper'] = _SendfileWrapper
+        return environ
+
+
+class _PooledWSGIServer(BaseWSGIServer):
+    """WSGI server that hands connections to a fixed pool of threads.
+
+    A thread is reserved before accept() is called, so a worker whose threads
+    are all busy (or held by idle keep-alive connections) leaves new
+    connections in the shared listen queue for the other workers, instead of
+    accepting them and making them wait for one of its own threads. Files
+    sent with Flask's send_file go out with sendfile() instead of being read
+    through Python in blocks.
+    """
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int, fd: int):
+        super().__init__(host, port, _send_files(app), handler=_RequestHandler, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self._free = threading.Semaphore(threads)
+        # Every worker wakes up for a new connection; those that lose the race get
+        # BlockingIOError from accept() instead of blocking until the next one
+        self.socket.setblocking(False)
+
+    def _handle_request_noblock(self):
+        # socketserver accepts first and only then calls process_request, which is too late to wait
+        if not self._free.acquire(timeout=_FREE_THREAD_POLL):
+            return
+        try:
+            request, client_address = self.get_request()
+        except OSError:
+            self._free.release()
+            return
+        if not self.verify_request(request, client_address):
+            self.shutdown_request(request)
+            self._free.release()
+            return
+        self.process_request(request, client_address)
+
+    def process_request(self, request, client_address):
+        # A thread was reserved for this connection before it was accepted
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._free.release()
+
+    def drain(self):
+        """Wait for the requests in flight to finish"""
+        self._pool.shutdown(wait=True)
+
+
+class PreforkServer:
+    """Serves a WSGI app from `workers` forked processes sharing one listening socket.
+
+    Everything the app loaded before `serve()` is shared copy-on-write with the
+    workers, and gc.freeze() keeps the garbage collector from touching (and so
+    copying) those pages. SIGTERM or SIGINT stops accepting, lets the requests in
+    flight finish for up to `graceful_timeout` seconds and then exits. Workers
+    that die are replaced. Unix only, as it relies on os.fork.
+    """
+
+    def __init__(self, app, host: str = '0.0.0.0', port: int = 5051, workers: int = 2, threads: int = 4,
+                 graceful_timeout: float = 30.0, backlog: int = 2048,
+                 pre_fork: Iterable[Callable[[], None]] = (), post_fork: Iterable[Callable[[], None]] = (),
+                 worker_exit: Iterable[Callable[[], None]] = ()):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.pre_fork: List[Callable[[], None]] = list(pre_fork)
+        self.post_fork: List[Callable[[], None]] = list(post_fork)
+        self.worker_exit: List[Callable[[], None]] = list(worker_exit)
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+        self._socket = None
+
+    def serve(self):
+        """Bind, fork the workers and supervise them until a shutdown signal arrives"""
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self._socket = socket.create_server((self.host, self.port), family=family, backlog=self.backlog)
+        self._socket.set_inheritable(True)
+
+        for hook in self.pre_fork:
+            hook()
+
+        # Move everything loaded so far out of the collector's reach, so collections
+        # in the workers don't write to (and un-share) the preloaded objects
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        print(f"Serving on http://{self.host}:{self.port} with {self.workers} workers x {self.threads} threads")
+
+        for _ in range(self.workers):
+            self._spawn()
+        try:
+            self._supervise()
+        finally:
+            self._socket.close()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self._run_worker()
+                status = 0
+            except BaseException as e:
+                print(f"Worker {os.getpid()} crashed: {e}", file=sys.stderr)
+            finally:
+                os._exit(status)
+        self._children[pid] = time.monotonic()
+
+    def _supervise(self):
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+
+            started = self._children.pop(pid, None)
+            if self._stopping or started is None:
+                continue
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, starting a new one")
+            # Don't spin if workers die as soon as they start
+            if time.monotonic() - started < 1:
+                time.sleep(1)
+            self._spawn()
+
+    def _handle_stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        print(f"Shutting down {len(self._children)} workers")
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+        threading.Thread(target=self._kill_stragglers, daemon=True).start()
+
+    def _kill_stragglers(self):
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            time.sleep(0.2)
+        for pid in list(self._children):
+            print(f"Worker {pid} did not stop in {self.graceful_timeout}s, killing it")
+            self._signal(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _signal(pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _run_worker(self):
+        # The parent's handlers were inherited; until serving, a signal simply ends the worker
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        for hook in self.post_fork:
+            hook()
+
+        server = _PooledWSGIServer(self.host, self.port, self.app, self.threads, fd=self._socket.fileno())
+
+        def stop(signum, frame):
+            # shutdown() waits for serve_forever to return, so it can't run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        server.serve_forever()
+        server.drain()
+        # Workers leave through os._exit, which skips atexit handlers
+        for hook in self.worker_exit:
+            hook()
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from json.decoder import WHITESPACE
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+from utils.compression import Variants, compress
+
+# Quiz types listed first, in this order; any other type follows alphabetically
+QUIZ_TYPE_ORDER = ('quiz', 'descobrir')
+
+# Headers sit at the top of quiz files, so reading this much is almost always enough
+HEADER_BYTES = 16384
+
+_decoder = json.JSONDecoder()
+
+
+class QuizHeader(NamedTuple):
+    """Everything the quiz listing needs from a quiz file, without its questions"""
+    subject: str
+    quiz_type: str
+    name: Any
+    description: Any
+    questions_per_session: int
+    mtime_ns: int
+
+
+class QuizListing(NamedTuple):
+    body: bytes
+    etag: str
+    variants: Variants
+
+
+def _parse_header(text: str) -> Optional[Dict[str, Any]]:
+    """Decode the top-level keys of a quiz file up to "questions", without parsing the questions.
+
+    Returns None if the text ends (or is malformed) before the questions start.
+    """
+    header: Dict[str, Any] = {}
+    try:
+        index = WHITESPACE.match(text, 0).end()
+        if text[index] != '{':
+            return None
+        index += 1
+        while True:
+            index = WHITESPACE.match(text, index).end()
+            if text[index] == '}':
+                return header
+            key, index = _decoder.raw_decode(text, index)
+            index = WHITESPACE.match(text, index).end()
+            if text[index] != ':':
+                return None
+            if key == 'questions':
+                return header
+            value, index = _decoder.raw_decode(text, WHITESPACE.match(text, index + 1).end())
+            header[key] = value
+            index = WHITESPACE.match(text, index).end()
+            if text[index] == ',':
+                index += 1
+            elif text[index] != '}':
+                return None
+    except (IndexError, ValueError):
+        return None
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Read a quiz file's metadata, falling back to a full parse if it comes after the questions"""
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_BYTES)
+        header = _parse_header(head.decode('utf-8', errors='ignore'))
+        if header is not None and all(key in header for key in ('name', 'description', 'questionsPerSession')):
+            return header
+        quiz_data = json.loads(head + f.read())
+    if not isinstance(quiz_data, dict):
+        raise ValueError("Invalid quiz format")
+    return {key: value for key, value in quiz_data.items() if key != 'questions'}
+
+
+class QuizManifest:
+    """Index of every {subject}_{type}.json quiz file and its header metadata.
+
+    Only the part of each file before its questions is parsed; the questions are
+    left to QuizStore, which compiles a quiz the first time it is requested. The
+    directory is checked at most every `check_interval` seconds and only files
+    whose mtime changed are read again. Listings are built once per locale.
+    """
+
+    def __init__(self, quizzes_dir: str, check_interval: float = 2.0):
+        self.quizzes_dir = quizzes_dir
+        self.check_interval = check_interval
+        self.version = 0
+        self._headers: Mapping[Tuple[str, str], QuizHeader] = MappingProxyType({})
+        self._listings: Dict[Tuple[str, str], QuizListing] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Pick up added, changed and removed quiz files. Returns True if anything changed."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            current = self._headers
+            headers: Dict[Tuple[str, str], QuizHeader] = {}
+            changed = False
+            try:
+                entries = list(os.scandir(self.quizzes_dir))
+            except OSError as e:
+                print(f"Error scanning quizzes: {e}")
+                entries = []
+
+            for entry in entries:
+                if not entry.name.endswith('.json') or '_' not in entry.name:
+                    continue
+                # Subjects may contain underscores (analise_estatistica), quiz types don't
+                subject, quiz_type = entry.name[:-len('.json')].rsplit('_', 1)
+                key = (subject, quiz_type)
+                mtime_ns = entry.stat().st_mtime_ns
+                header = current.get(key)
+                if header is None or header.mtime_ns != mtime_ns:
+                    try:
+                        data = read_header(entry.path)
+                        header = QuizHeader(
+                            subject, quiz_type,
+                            data.get('name', {}),
+                            data.get('description', {}),
+                            data.get('questionsPerSession', 10),
+                            mtime_ns
+                        )
+                        changed = True
+                    except (OSError, ValueError) as e:
+                        print(f"Error loading quiz {entry.path}: {e}")
+                if header is not None:
+                    headers[key] = header
+
+            if set(headers) != set(current):
+                changed = True
+            if changed:
+                self._headers = MappingProxyType(headers)
+                self._listings = {}
+                self.version += 1
+            return changed
+
+    def invalidate(self):
+        """Drop the built listings, e.g. when the subjects of a locale change"""
+        self._listings = {}
+
+    def quizzes(self) -> List[Tuple[str, str]]:
+        """(subject, quiz_type) of every indexed quiz"""
+        self.refresh()
+        return sorted(self._headers)
+
+    def listing(self, locale: str, lang: str, subjects: Iterable[str]) -> QuizListing:
+        """The encoded /api/quizzes listing of a locale's subjects, built once per change"""
+        self.refresh()
+        listings = self._listings
+        key = (locale, lang)
+        listing = listings.get(key)
+        if listing is None:
+            listing = self._build_listing(lang, subjects)
+            listings[key] = listing
+        return listing
+
+    def _build_listing(self, lang: str, subjects: Iterable[str]) -> QuizListing:
+        by_subject: Dict[str, List[QuizHeader]] = {}
+        for header in self._headers.values():
+            by_subject.setdefault(header.subject, []).append(header)
+
+        def pick(value: Any, default: str) -> str:
+            if isinstance(value, dict):
+                return value.get(lang, value.get('pt', default))
+            return value or default
+
+        def type_order(header: QuizHeader) -> Tuple[int, str]:
+            if header.quiz_type in QUIZ_TYPE_ORDER:
+                return QUIZ_TYPE_ORDER.index(header.quiz_type), ''
+            return len(QUIZ_TYPE_ORDER), header.quiz_type
+
+        quizzes = [
+            {
+                "subject": header.subject,
+                "type": header.quiz_type,
+                "name": pick(header.name, f"{header.subject} {header.quiz_type}"),
+                "description": pick(header.description, ''),
+                "questionsPerSession": header.questions_per_session
+            }
+            for subject_id in subjects
+            for header in sorted(by_subject.get(subject_id, ()), key=type_order)
+        ]
+        body = json.dumps(quizzes, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return QuizListing(body, hashlib.sha1(body).hexdigest(), compress(body))
@@ -0,0 +1,158 @@
+import os
+import json
+import random
+import hashlib
+import threading
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+from utils.compression import Variants, compress
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CompiledQuiz(NamedTuple):
+    """A quiz rendered for one language, ready to be sent as-is"""
+    body: bytes
+    etag: str
+    mtime_ns: int
+    # The body, precompressed for each content coding
+    variants: Variants
+    # Everything but the questions, encoded as an object without its closing brace
+    header: bytes
+    questions_per_session: int
+    # Each question encoded on its own, without the explanation
+    questions: Tuple[bytes, ...]
+    # Encoded explanation strings keyed by question id
+    explanations: Dict[str, bytes]
+    # (index of the correct option, number of options) keyed by question id, to check submitted answers
+    answers: Dict[str, Tuple[int, int]]
+
+    def session(self, count: int, seed: int) -> bytes:
+        """Encode a reproducible sample of `count` questions chosen with `seed`"""
+        count = min(max(count, 1), len(self.questions))
+        picked = random.Random(seed).sample(range(len(self.questions)), count)
+        return b''.join((
+            self.header,
+            b'"seed":%d,"total":%d,"questions":[' % (seed, len(self.questions)),
+            b','.join(self.questions[i] for i in picked),
+            b']}'
+        ))
+
+    def explanations_for(self, ids: Iterable[str]) -> bytes:
+        """Encode the explanations of the given question ids as a JSON object"""
+        items: List[bytes] = [
+            _dumps(question_id) + b':' + self.explanations[question_id]
+            for question_id in ids
+            if question_id in self.explanations
+        ]
+        return b'{' + b','.join(items) + b'}'
+
+
+class QuizStore:
+    """Compiles quiz files once per language and keeps the response bytes in memory"""
+
+    def __init__(self, quizzes_dir: str):
+        self.quizzes_dir = quizzes_dir
+        self._compiled: Dict[Tuple[str, str, str], CompiledQuiz] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def quiz_path(self, subject: str, quiz_type: str) -> str:
+        """Path of a quiz file, using the subject_typeofquiz.json naming convention"""
+        return os.path.join(self.quizzes_dir, f"{subject}_{quiz_type}.json")
+
+    def get(self, subject: str, quiz_type: str, lang: str) -> Optional[CompiledQuiz]:
+        """Get the compiled quiz, recompiling it if the file changed since the last call.
+
+        Returns None when the quiz file does not exist.
+        """
+        path = self.quiz_path(subject, quiz_type)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        key = (subject, quiz_type, lang)
+        entry = self._compiled.get(key)
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        with self._lock:
+            # Another thread may have compiled it while we waited for the lock
+            entry = self._compiled.get(key)
+            if entry is None or entry.mtime_ns != mtime_ns:
+                entry = self._compile(path, lang, mtime_ns)
+                self._compiled[key] = entry
+        return entry
+
+    def clear(self):
+        """Drop every compiled quiz"""
+        with self._lock:
+            self._compiled.clear()
+
+    def _compile(self, path: str, lang: str, mtime_ns: int) -> CompiledQuiz:
+        with open(path, 'r', encoding='utf-8') as f:
+            quiz_data = json.load(f)
+
+        if not quiz_data:
+            raise ValueError("Invalid quiz format")
+
+        translated = self.translate(quiz_data, lang)
+        body = _dumps(translated)
+        etag = hashlib.sha1(body).hexdigest()
+
+        questions = translated.get('questions') or []
+        header = _dumps({key: value for key, value in translated.items() if key != 'questions'})
+        header = header[:-1] + (b',' if len(header) > 2 else b'')
+
+        return CompiledQuiz(
+            body=body,
+            etag=etag,
+            mtime_ns=mtime_ns,
+            variants=compress(body),
+            header=header,
+            questions_per_session=translated.get('questionsPerSession', 10),
+            questions=tuple(
+                _dumps({key: value for key, value in question.items() if key != 'explanation'})
+                for question in questions
+            ),
+            explanations={
+                str(question.get('id', index)): _dumps(question.get('explanation', ''))
+                for index, question in enumerate(questions)
+            },
+            answers={
+                str(question.get('id', index)): (question.get('correctAnswer', -1), len(question.get('options') or ()))
+                for index, question in enumerate(questions)
+            }
+        )
+
+    @staticmethod
+    def translate(quiz_data: Dict[str, Any], lang: str) -> Dict[str, Any]:
+        """Extract one language from a translated quiz; legacy quizzes are returned unchanged"""
+        questions = quiz_data.get('questions') or []
+        if not questions or not isinstance(questions[0].get('question'), dict):
+            # Legacy format without translations
+            return quiz_data
+
+        def pick(value: Dict[str, str]) -> str:
+            return value.get(lang, value.get('pt', ''))
+
+        return {
+            'name': pick(quiz_data['name']),
+            'description': pick(quiz_data['description']),
+            'questionsPerSession': quiz_data['questionsPerSession'],
+            'questions': [
+                {
+                    'id': question['id'],
+                    'question': pick(question['question']),
+                    'options': [pick(opt) for opt in question['options']],
+                    'correctAnswer': question['correctAnswer'],
+                    'explanation': pick(question['explanation'])
+                }
+                for question in questions
+            ]
+        }
@@ -0,0 +1,68 @@
+import os
+from typing import Iterable, List, Tuple
+from utils.compression import compress
+
+# Features that need the server on every use and can't be pre-rendered: the calculator
+# evaluates /api/distribution, the podcasts stream /audio/<file> and load /api/audio/<file>/peaks
+DYNAMIC_FEATURES = frozenset({'calculator', 'podcasts'})
+
+
+def site_routes(subject_registry, locale: str) -> List[Tuple[str, str]]:
+    """List (url, output path) for every page of a locale"""
+    routes = [(f'/{locale}/', 'index.html')]
+    for subject_id, subject in subject_registry.for_locale(locale).subjects.items():
+        routes.append((f'/{locale}/{subject_id}', f'{subject_id}/index.html'))
+        for feature in subject.features:
+            if feature.id in DYNAMIC_FEATURES:
+                continue
+            routes.append((f'/{locale}/{subject_id}/{feature.id}', f'{subject_id}/{feature.id}/index.html'))
+    return routes
+
+
+def export_site(app, output_dir: str, locales: Iterable[str], subject_registry, quiz_manifest) -> int:
+    """Pre-render every page and quiz payload for every locale into a static tree.
+
+    The tree is laid out as <output>/<locale>/<page>/index.html, mirroring the
+    /<locale>/ URLs, with quiz payloads under <output>/<locale>/api/, so nginx or
+    a CDN can serve it without Python. Quiz pages fall back to those payloads
+    when the session API is missing; DYNAMIC_FEATURES are left out. Pages link
+    to /static/, which isn't copied and has to be served alongside the tree.
+    Every file gets a .gz sibling for gzip_static. Returns the number of files written.
+    """
+    written = 0
+    for locale in sorted(locales):
+        # Every URL names its locale, so no session cookie is needed
+        client = app.test_client(use_cookies=False)
+
+        targets = site_routes(subject_registry, locale)
+        targets += [
+            (f'/api/quiz/{subject}/{quiz_type}?locale={locale}', f'api/quiz/{subject}/{quiz_type}.json')
+            for subject, quiz_type in quiz_manifest.quizzes()
+        ]
+        targets.append((f'/api/quizzes?locale={locale}', 'api/quizzes.json'))
+
+        for url, relative_path in targets:
+            response = client.get(url)
+            if response.status_code != 200:
+                print(f"Skipping {locale} {url}: HTTP {response.status_code}")
+                continue
+            written += _write(os.path.join(output_dir, locale, relative_path), response.get_data())
+
+        # Any path that is not a page renders the 404 template
+        response = client.get(f'/{locale}/.not-found')
+        written += _write(os.path.join(output_dir, locale, '404.html'), response.get_data())
+
+    return written
+
+
+def _write(path: str, data: bytes) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    compressed = compress(data).get('gzip')
+    if compressed is None:
+        return 1
+    with open(path + '.gz', 'wb') as f:
+        f.write(compressed)
+    return 2
@@ -0,0 +1,81 @@
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, NamedTuple, Tuple
+
+
+class Feature(NamedTuple):
+    id: str
+    name: str
+    icon: str
+
+
+class Subject(NamedTuple):
+    name: str
+    icon: str
+    features: Tuple[Feature, ...]
+
+
+class SubjectIndex:
+    """Read-only view of the subjects and features defined for one locale"""
+
+    def __init__(self, translations: Dict[str, Any]):
+        coming_soon = translations.get('coming_soon', {})
+        subjects = {}
+
+        for subject_id, subject_data in translations.get('subjects', {}).items():
+            # Skip coming soon subjects
+            if subject_id in coming_soon:
+                continue
+
+            features = tuple(
+                Feature(page_id, page_id, page_data.get('icon', 'fa-question-circle'))
+                for page_id, page_data in subject_data.get('pages', {}).items()
+                if page_id != 'home'  # Skip home page as it's the subject index
+            )
+            subjects[subject_id] = Subject(
+                subject_data.get('name', ''),
+                subject_data.get('icon', 'fa-chart-line'),
+                features
+            )
+
+        self.subjects: Mapping[str, Subject] = MappingProxyType(subjects)
+        self.routes: FrozenSet[Tuple[str, str]] = frozenset(
+            (subject_id, feature.id)
+            for subject_id, subject in subjects.items()
+            for feature in subject.features
+        )
+
+    def has_subject(self, subject: str) -> bool:
+        return subject in self.subjects
+
+    def has_feature(self, subject: str, feature: str) -> bool:
+        return (subject, feature) in self.routes
+
+
+class SubjectRegistry:
+    """Builds a SubjectIndex per locale once, instead of on every request"""
+
+    def __init__(self, translation_manager):
+        self.translation_manager = translation_manager
+        self._indexes: Mapping[str, SubjectIndex] = MappingProxyType({})
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild every locale index from the current translations"""
+        indexes = {}
+        for locale in self.translation_manager.available_locales:
+            try:
+                indexes[locale] = SubjectIndex(self.translation_manager.load_translations(locale))
+            except Exception as e:
+                print(f"Error loading subjects from translations for {locale}: {e}")
+                indexes[locale] = SubjectIndex({})
+        # Swap in the new indexes in a single assignment
+        self._indexes = MappingProxyType(indexes)
+
+    def for_locale(self, locale: str) -> SubjectIndex:
+        """Get the index for a locale, falling back to the default locale"""
+        index = self._indexes.get(locale)
+        if index is None:
+            index = self._indexes.get(self.translation_manager.default_locale)
+        if index is None:
+            index = SubjectIndex({})
+        return index
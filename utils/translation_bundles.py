@@ -0,0 +1,287 @@
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+from jinja2 import Environment, meta, nodes
+from utils.translations import FrozenDict, TranslationManager
+
+KeyPath = Tuple[str, ...]
+
+# A path component standing for every key, from dynamic lookups like translations.subjects[subject_id]
+WILDCARD = '*'
+# Last component of a path that only needs the keys of a mapping (Object.keys in JS)
+KEYS = '#keys'
+
+# Jinja resolves x.items (and every other dict method name) to the method, so the whole mapping is used
+_MAPPING_METHODS = frozenset(name for name in dir(dict) if not name.startswith('_'))
+
+# window.translations followed by .key, ?.key, [...] and ?.[...] accessors
+_JS_CHAIN = re.compile(r'(Object\.keys\(\s*)?window\.translations((?:\s*\??\.\s*[A-Za-z_$][\w$]*|\s*(?:\?\.)?\[[^\[\]]*\])*)')
+_JS_ACCESSOR = re.compile(r'\??\.\s*([A-Za-z_$][\w$]*)|\[\s*([^\[\]]*?)\s*\]')
+_JS_STRING = re.compile(r'''^(['"`])([^'"`]*)\1$''')
+# Chains that are assigned, or only tested (x && ..., if (x) {, x ? a : b), don't need their content
+_JS_SKIP = re.compile(r'\s*(?:&&|\)\s*\{|\?(?![.?])|=(?!=))')
+
+
+def script_key_paths(source: str) -> Set[KeyPath]:
+    """Key paths a script reads from window.translations"""
+    paths: Set[KeyPath] = set()
+    for match in _JS_CHAIN.finditer(source):
+        if _JS_SKIP.match(source, match.end()):
+            continue
+        path: List[str] = []
+        for name, index in _JS_ACCESSOR.findall(match.group(2)):
+            if name:
+                path.append(name)
+            else:
+                literal = _JS_STRING.match(index)
+                path.append(literal.group(2) if literal else index if index.isdigit() else WILDCARD)
+        if match.group(1) and source[match.end():].lstrip().startswith(')'):
+            path.append(KEYS)
+        paths.add(tuple(path))
+    return paths
+
+
+class _TemplateVisitor:
+    """Collects the translation key paths, scripts and inline text of a Jinja AST"""
+
+    def __init__(self, variable: str):
+        self.variable = variable
+        self.paths: Set[KeyPath] = set()
+        self.bundles: Set[str] = set()
+        self.static_scripts: Set[str] = set()
+        self.text: List[str] = []
+
+    def visit(self, node: nodes.Node):
+        if isinstance(node, (nodes.Getattr, nodes.Getitem)):
+            chain = self._chain(node)
+            if chain is not None:
+                path, dynamic = chain
+                self.paths.add(path)
+                for argument in dynamic:
+                    self.visit(argument)
+                return
+        elif isinstance(node, nodes.Name):
+            # The variable on its own (passed to a filter, macro or set) needs everything
+            if node.name == self.variable and node.ctx == 'load':
+                self.paths.add(())
+            return
+        elif isinstance(node, nodes.Call):
+            self._script_reference(node)
+        elif isinstance(node, nodes.TemplateData):
+            self.text.append(node.data)
+
+        for child in node.iter_child_nodes():
+            self.visit(child)
+
+    def _chain(self, node: nodes.Node) -> Optional[Tuple[KeyPath, List[nodes.Node]]]:
+        accessors: List[Tuple[str, bool]] = []
+        dynamic: List[nodes.Node] = []
+        while isinstance(node, (nodes.Getattr, nodes.Getitem)):
+            if isinstance(node, nodes.Getattr):
+                accessors.append((node.attr, True))
+            elif isinstance(node.arg, nodes.Const) and isinstance(node.arg.value, (str, int)):
+                accessors.append((str(node.arg.value), False))
+            else:
+                accessors.append((WILDCARD, False))
+                dynamic.append(node.arg)
+            node = node.node
+        if not (isinstance(node, nodes.Name) and node.name == self.variable):
+            return None
+
+        path: List[str] = []
+        for key, is_attribute in reversed(accessors):
+            if is_attribute and key in _MAPPING_METHODS:
+                break
+            path.append(key)
+        return tuple(path), dynamic
+
+    def _script_reference(self, node: nodes.Call):
+        if not isinstance(node.node, nodes.Name) or not node.args or not isinstance(node.args[0], nodes.Const):
+            return
+        if node.node.name == 'asset_url':
+            self.bundles.add(node.args[0].value)
+        elif node.node.name == 'url_for' and node.args[0].value == 'static':
+            for keyword in node.kwargs:
+                if keyword.key == 'filename' and isinstance(keyword.value, nodes.Const):
+                    self.static_scripts.add(keyword.value.value)
+
+
+class TemplateUsage(NamedTuple):
+    """Translation keys a page template (with everything it extends and includes) and its scripts use"""
+    paths: FrozenSet[KeyPath]
+    script_paths: FrozenSet[KeyPath]
+    # Each returns False once a template, script or bundle the analysis read has changed
+    checks: Tuple[Callable[[], bool], ...]
+
+    def is_current(self) -> bool:
+        return all(check() for check in self.checks)
+
+
+def _build_trie(paths: Iterable[KeyPath]) -> Optional[Dict[str, Any]]:
+    """Nest key paths into a trie where None means "the whole subtree"; None for the empty path"""
+    root: Dict[str, Any] = {}
+    for path in sorted(paths, key=len):
+        if not path:
+            return None
+        node = root
+        for key in path[:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                break
+            node = child
+        else:
+            if path[-1] == KEYS:
+                node.setdefault(WILDCARD, {})
+            else:
+                node[path[-1]] = None
+    return root
+
+
+def _merge(a: Optional[Dict[str, Any]], b: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if a is None or b is None:
+        return None
+    merged = dict(a)
+    for key, child in b.items():
+        merged[key] = _merge(merged[key], child) if key in merged else child
+    return merged
+
+
+_MISSING = object()
+
+
+def _pick(value: Any, trie: Optional[Dict[str, Any]]) -> Any:
+    if trie is None or not isinstance(value, Mapping):
+        return value
+    wildcard = trie.get(WILDCARD, _MISSING)
+    picked: Dict[str, Any] = {}
+    for key, item in value.items():
+        child = trie.get(key, _MISSING)
+        if wildcard is not _MISSING:
+            child = wildcard if child is _MISSING else _merge(child, wildcard)
+        if child is not _MISSING:
+            picked[key] = _pick(item, child)
+    return FrozenDict(picked)
+
+
+def trim(data: Mapping[str, Any], paths: Iterable[KeyPath]) -> FrozenDict:
+    """Copy only the given key paths of `data`; untouched subtrees are shared, not copied"""
+    trimmed = _pick(data, _build_trie(paths))
+    return trimmed if isinstance(trimmed, FrozenDict) else FrozenDict(trimmed)
+
+
+class PageTranslations(NamedTuple):
+    # What the page's templates read from `translations`
+    template: FrozenDict
+    # What its scripts read from window.translations
+    script: FrozenDict
+
+
+class _Entry(NamedTuple):
+    view: FrozenDict
+    usage: TemplateUsage
+    translations: PageTranslations
+
+
+class TranslationBundles:
+    """Per-page translations trimmed to the keys the page actually uses.
+
+    Each page template is parsed once, along with the templates it extends or
+    includes and the scripts it loads, to find the translation keys it reads.
+    Dynamic lookups (translations.subjects[subject_id]) keep every key at that
+    level and passing a whole subtree somewhere keeps all of it, so trimming
+    never drops a key a page could read. Bundles are built once per (page,
+    locale) and rebuilt when the translations, templates or scripts change.
+    """
+
+    def __init__(self, translation_manager: TranslationManager, jinja_env: Environment, static_folder: str,
+                 script_sources: Callable[[str], Iterable[str]], variable: str = 'translations'):
+        self.translation_manager = translation_manager
+        self.jinja_env = jinja_env
+        self.static_folder = static_folder
+        self.script_sources = script_sources
+        self.variable = variable
+        self.hits = 0
+        self.misses = 0
+        self._usages: Dict[str, TemplateUsage] = {}
+        self._entries: Dict[Tuple[str, str, str, str, Tuple[str, ...]], _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, template: str, section: str, page: str, locale: str,
+            include: Tuple[str, ...] = ()) -> PageTranslations:
+        """The translations of get_translations(section, page, locale, include), trimmed for `template`"""
+        view = self.translation_manager.get_translations(section, page, locale, include=include)
+        usage = self.usage(template)
+        key = (template, section, page, locale, include)
+        entry = self._entries.get(key)
+        if entry is not None and entry.view is view and entry.usage is usage:
+            self.hits += 1
+            return entry.translations
+
+        self.misses += 1
+        translations = PageTranslations(trim(view, usage.paths), trim(view, usage.script_paths))
+        self._entries[key] = _Entry(view, usage, translations)
+        return translations
+
+    def usage(self, template: str) -> TemplateUsage:
+        """The analysed key usage of a page template, analysing it again if any of its files changed"""
+        usage = self._usages.get(template)
+        if usage is not None and usage.is_current():
+            return usage
+        with self._lock:
+            usage = self._usages.get(template)
+            if usage is None or not usage.is_current():
+                usage = self._analyze(template)
+                self._usages[template] = usage
+        return usage
+
+    def _analyze(self, template: str) -> TemplateUsage:
+        visitor = _TemplateVisitor(self.variable)
+        checks: List[Callable[[], bool]] = []
+        pending, seen = [template], set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            source, filename, uptodate = self.jinja_env.loader.get_source(self.jinja_env, name)
+            if uptodate is not None:
+                checks.append(uptodate)
+            ast = self.jinja_env.parse(source, name, filename)
+            visitor.visit(ast)
+            for reference in meta.find_referenced_templates(ast):
+                if reference is None:
+                    # A template chosen at render time could read anything
+                    visitor.paths.add(())
+                else:
+                    pending.append(reference)
+
+        script_paths: Set[KeyPath] = set()
+        for text in visitor.text:
+            script_paths |= script_key_paths(text)
+        scripts = set(visitor.static_scripts)
+        for bundle in visitor.bundles:
+            sources = tuple(self.script_sources(bundle))
+            checks.append(lambda bundle=bundle, sources=sources: tuple(self.script_sources(bundle)) == sources)
+            scripts.update(sources)
+        for script in sorted(scripts):
+            if not script.endswith('.js'):
+                continue
+            path = os.path.join(self.static_folder, script)
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+                with open(path, 'r', encoding='utf-8') as f:
+                    script_paths |= script_key_paths(f.read())
+            except OSError as e:
+                print(f"Error reading script {script}: {e}")
+                continue
+            checks.append(lambda path=path, mtime_ns=mtime_ns: _mtime_ns(path) == mtime_ns)
+
+        return TemplateUsage(frozenset(visitor.paths), frozenset(script_paths), tuple(checks))
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -1,73 +1,197 @@
 import os
 import json
-from functools import lru_cache
-from typing import Dict, Any, Set
+import threading
+from collections import ChainMap
+from types import MappingProxyType
+from typing import Dict, Any, Callable, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+
+class FrozenDict(dict):
+    """A dict that refuses to be modified.
+
+    It is still a real dict, so Jinja, json.dumps and tojson treat it as one.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Translations are read-only; build a layered view instead")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into FrozenDicts and lists into tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def layered(*layers: Mapping[str, Any]) -> FrozenDict:
+    """Merge the top level of several mappings, earlier layers winning, without copying nested data."""
+    return FrozenDict(ChainMap(*layers))
+
+
+class TranslationSnapshot(NamedTuple):
+    """The parsed, read-only content of one translation file."""
+    locale: str
+    data: FrozenDict
+    mtime_ns: int
+
 
 class TranslationManager:
     def __init__(self, translations_dir: str = 'translations'):
         self.translations_dir = translations_dir
         self.default_locale = 'pt_PT'
-        self._translations: Dict[str, Dict[str, Any]] = {}
-        self._available_locales: Set[str] = set()
+        self._snapshots: Mapping[str, TranslationSnapshot] = MappingProxyType({})
+        self._views: Dict[Tuple[str, str, str, Tuple[str, ...]], FrozenDict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._listeners: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watcher = threading.Event()
         # Preload translations at initialization
         self._preload_translations()
-        
+
     def _preload_translations(self):
         """Preload all translation files to improve performance."""
         try:
-            for file in os.listdir(self.translations_dir):
-                if file.endswith('.json'):
-                    locale = file.replace('.json', '')
-                    self._available_locales.add(locale)
-                    # Load the translations
-                    self.load_translations(locale)
-            # Clear caches after preloading to ensure fresh state
-            self.get_translations.cache_clear()
-            print(f"Preloaded translations for: {', '.join(self._available_locales)}")
+            self.check_for_updates()
+            print(f"Preloaded translations for: {', '.join(self._snapshots)}")
         except Exception as e:
             print(f"Error preloading translations: {e}")
-            
-    @lru_cache(maxsize=16)
-    def load_translations(self, locale: str) -> Dict[str, Any]:
-        """Load translations for a given locale with improved caching."""
-        if locale not in self._translations:
+
+    def _read_snapshot(self, locale: str, mtime_ns: int) -> TranslationSnapshot:
+        file_path = os.path.join(self.translations_dir, f'{locale}.json')
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return TranslationSnapshot(locale, freeze(json.load(f)), mtime_ns)
+
+    def check_for_updates(self) -> bool:
+        """Reload translation files whose mtime changed and swap them in atomically.
+
+        Returns True if any snapshot changed. A file that fails to parse keeps its
+        previous snapshot, so a half-saved edit never takes the site down.
+        """
+        with self._lock:
+            current = self._snapshots
+            snapshots: Dict[str, TranslationSnapshot] = {}
+            changed = False
+
+            for entry in os.scandir(self.translations_dir):
+                if not entry.name.endswith('.json'):
+                    continue
+                locale = entry.name[:-len('.json')]
+                mtime_ns = entry.stat().st_mtime_ns
+                snapshot = current.get(locale)
+                if snapshot is None or snapshot.mtime_ns != mtime_ns:
+                    try:
+                        snapshot = self._read_snapshot(locale, mtime_ns)
+                        changed = True
+                    except (OSError, ValueError) as e:
+                        print(f"Error loading translations for {locale}: {e}")
+                if snapshot is not None:
+                    snapshots[locale] = snapshot
+
+            if set(snapshots) != set(current):
+                changed = True
+            if not changed:
+                return False
+
+            # Readers see either the old or the new snapshots, never a mix
+            self._snapshots = MappingProxyType(snapshots)
+            self._views = {}
+
+        for listener in list(self._listeners):
             try:
-                file_path = os.path.join(self.translations_dir, f'{locale}.json')
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self._translations[locale] = json.load(f)
-            except FileNotFoundError:
+                listener()
+            except Exception as e:
+                print(f"Error in translation reload listener: {e}")
+        return True
+
+    def add_reload_listener(self, listener: Callable[[], None]):
+        """Call `listener` every time new translation snapshots are swapped in."""
+        self._listeners.append(listener)
+
+    def start_watcher(self, interval: float = 2.0):
+        """Check the translation files for changes every `interval` seconds in a daemon thread."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def watch():
+            while not self._stop_watcher.wait(interval):
+                try:
+                    if self.check_for_updates():
+                        print(f"Reloaded translations for: {', '.join(self._snapshots)}")
+                except Exception as e:
+                    print(f"Error checking translations for updates: {e}")
+
+        self._stop_watcher.clear()
+        self._watcher = threading.Thread(target=watch, name='translation-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the background watcher started by start_watcher and wait for it to exit."""
+        self._stop_watcher.set()
+        if self._watcher is not None and self._watcher is not threading.current_thread():
+            self._watcher.join()
+
+    @property
+    def available_locales(self) -> FrozenSet[str]:
+        """Locales that have a translation file."""
+        return frozenset(self._snapshots)
+
+    def load_translations(self, locale: str) -> FrozenDict:
+        """Get the read-only translations for a given locale."""
+        snapshot = self._snapshots.get(locale)
+        if snapshot is None:
+            if locale != self.default_locale:
                 print(f"Warning: Translation file for {locale} not found, using default locale")
                 return self.load_translations(self.default_locale)
-        return self._translations[locale]    
-    
-    @lru_cache(maxsize=32)
-    def get_translations(self, section: str, page: str, locale: str = 'pt_PT') -> Dict[str, Any]:
-        """Get translations for a specific section and page with enhanced caching."""
+            return FrozenDict()
+        return snapshot.data
+
+    def get_translations(self, section: str, page: str, locale: str = 'pt_PT',
+                         include: Tuple[str, ...] = ()) -> FrozenDict:
+        """Get translations for a specific section and page.
+
+        `include` names extra top-level trees (e.g. 'pages') to layer on top.
+        Views are built once per snapshot and shared, which is safe because they
+        are read-only.
+        """
+        key = (section, page, locale, include)
+        views = self._views
+        view = views.get(key)
+        if view is not None:
+            self.hits += 1
+            return view
+
+        self.misses += 1
         translations = self.load_translations(locale)
-        
+
         # Get general translations that should be available everywhere
-        result = {
+        result: Dict[str, Any] = {
             'general': translations.get('general', {}),
             'subjects': translations.get('subjects', {})  # Always include full subjects data
         }
-        
+
         if section == 'general':
             # For general pages, get page-specific translations
-            result.update({
-                'page': translations.get('pages', {}).get(page, {})
-            })
+            result['page'] = translations.get('pages', {}).get(page, {})
         else:
             # For subject pages, get subject and page-specific translations
             subject_data = translations.get('subjects', {}).get(section, {})
             if subject_data:
-                result.update({
-                    'subject': subject_data,  # Pass the full subject dict, including 'pages'
-                    'page': subject_data.get('pages', {}).get(page, {})
-                })
-            
-        return result
-
-    def get_coming_soon_subjects(self, locale: str = 'pt_PT') -> Dict[str, Dict[str, str]]:
+                result['subject'] = subject_data  # Pass the full subject dict, including 'pages'
+                result['page'] = subject_data.get('pages', {}).get(page, {})
+
+        extras = {name: translations.get(name, {}) for name in include}
+        view = layered(result, extras)
+        views[key] = view
+        return view
+
+    def get_coming_soon_subjects(self, locale: str = 'pt_PT') -> Mapping[str, Any]:
         """Get all coming soon subjects."""
         translations = self.load_translations(locale)
         return translations.get('coming_soon', {})